@@ -21,25 +21,72 @@ import sys
 import time
 
 
-def send_command(sock, req_id, command):
+def _read_response(rfile):
+    """Read one newline-terminated response from the server."""
+    line = rfile.readline()
+    if not line:
+        raise ConnectionError("Connection closed by server")
+    return line.decode('utf-8').strip()
+
+
+def send_command(rfile, wfile, req_id, command):
     """Send a command and receive response."""
     full_cmd = f"?{req_id:04X} {command}\n"
     print(f"TX: {full_cmd.strip()}")
-    sock.sendall(full_cmd.encode('utf-8'))
+    wfile.write(full_cmd.encode('utf-8'))
+    wfile.flush()
 
-    response = sock.recv(4096).decode('utf-8').strip()
+    response = _read_response(rfile)
     print(f"RX: {response}")
     return response
 
 
+def send_pipelined(rfile, wfile, first_id, commands):
+    """
+    Send several commands in a single write and read all responses.
+
+    The server answers requests strictly in order, so the N responses can
+    be read back in one loop instead of paying one round trip per command.
+    Use send_command() instead when a response decides the next command.
+    """
+    for i, command in enumerate(commands):
+        full_cmd = f"?{first_id + i:04X} {command}\n"
+        print(f"TX: {full_cmd.strip()}")
+        wfile.write(full_cmd.encode('utf-8'))
+    wfile.flush()
+
+    responses = [_read_response(rfile) for _ in commands]
+    for response in responses:
+        print(f"RX: {response}")
+    return responses
+
+
+# (test name, command, failure message or None if the reply is not checked)
+CONNECTION_TESTS = [
+    ("Connect", "Connect",
+     "Connect command rejected"),
+    ("GetAnalyzerVisibleName", "GetAnalyzerVisibleName",
+     "Could not get device name"),
+    ("GetAllAnalyzerParameterNames", "GetAllAnalyzerParameterNames",
+     "Could not get parameter names"),
+    ("DefineSpectrumFAT (1D)",
+     "DefineSpectrumFAT StartEnergy:82.0 EndEnergy:86.0 "
+     "StepWidth:0.1 DwellTime:0.5 PassEnergy:10.0",
+     "Could not define FAT spectrum"),
+    ("ValidateSpectrum", "ValidateSpectrum",
+     "Spectrum validation failed"),
+    ("ClearSpectrum", "ClearSpectrum",
+     "Could not clear spectrum"),
+    ("Disconnect", "Disconnect", None),
+]
+
+
 def test_connection(host='localhost', port=7010):
     """Test connection to Prodigy server."""
     print(f"\n{'='*50}")
     print(f"Testing connection to {host}:{port}")
     print(f"{'='*50}\n")
 
-    req_id = 0
-
     try:
         # Create socket connection
         print("Connecting...")
@@ -48,68 +95,34 @@ def test_connection(host='localhost', port=7010):
         sock.connect((host, port))
         print(f"Connected!\n")
 
-        # Test 1: Connect command
-        print("Test 1: Connect")
-        req_id += 1
-        response = send_command(sock, req_id, "Connect")
-        if "OK" not in response:
-            print("  FAILED - Connect command rejected")
-            return False
-        print("  PASSED\n")
-
-        # Test 2: Get visible name
-        print("Test 2: GetAnalyzerVisibleName")
-        req_id += 1
-        response = send_command(sock, req_id, "GetAnalyzerVisibleName")
-        if "OK" not in response:
-            print("  FAILED - Could not get device name")
-            return False
-        print("  PASSED\n")
-
-        # Test 3: Get parameter names
-        print("Test 3: GetAllAnalyzerParameterNames")
-        req_id += 1
-        response = send_command(sock, req_id, "GetAllAnalyzerParameterNames")
-        if "OK" not in response:
-            print("  FAILED - Could not get parameter names")
-            return False
-        print("  PASSED\n")
-
-        # Test 4: Define 1D spectrum (FAT mode)
-        print("Test 4: DefineSpectrumFAT (1D)")
-        req_id += 1
-        response = send_command(sock, req_id,
-            "DefineSpectrumFAT StartEnergy:82.0 EndEnergy:86.0 "
-            "StepWidth:0.1 DwellTime:0.5 PassEnergy:10.0")
-        if "OK" not in response:
-            print("  FAILED - Could not define FAT spectrum")
-            return False
-        print("  PASSED\n")
+        rfile = sock.makefile('rb')
+        wfile = sock.makefile('wb')
 
-        # Test 5: Validate spectrum
-        print("Test 5: ValidateSpectrum")
-        req_id += 1
-        response = send_command(sock, req_id, "ValidateSpectrum")
+        # Nothing else is sent to a server that rejects Connect
+        name, command, failure = CONNECTION_TESTS[0]
+        print(f"Test 1: {name}")
+        response = send_command(rfile, wfile, 1, command)
         if "OK" not in response:
-            print("  FAILED - Spectrum validation failed")
+            print(f"  FAILED - {failure}")
             return False
         print("  PASSED\n")
 
-        # Test 6: Clear spectrum (clean up)
-        print("Test 6: ClearSpectrum")
-        req_id += 1
-        response = send_command(sock, req_id, "ClearSpectrum")
-        if "OK" not in response:
-            print("  FAILED - Could not clear spectrum")
-            return False
-        print("  PASSED\n")
-
-        # Test 7: Disconnect
-        print("Test 7: Disconnect")
-        req_id += 1
-        response = send_command(sock, req_id, "Disconnect")
-        print("  PASSED\n")
-
+        # None of the remaining commands depends on an earlier reply, so
+        # send them at once and check the replies afterwards
+        responses = send_pipelined(
+            rfile, wfile, 2, [command for _, command, _ in CONNECTION_TESTS[1:]])
+        print()
+
+        for i, ((name, _, failure), response) in enumerate(
+                zip(CONNECTION_TESTS[1:], responses), start=2):
+            print(f"Test {i}: {name}")
+            if failure and "OK" not in response:
+                print(f"  FAILED - {failure}")
+                return False
+            print("  PASSED\n")
+
+        rfile.close()
+        wfile.close()
         sock.close()
 
         print(f"{'='*50}")
@@ -13,20 +13,58 @@ Protocol Summary:
 - Single client connection only
 - Commands terminated with newline \\n
 
+Runs on a single asyncio event loop: client I/O and the acquisition
+simulation are cooperative tasks that yield after every energy step, and
+the one CPU-heavy step (building a spectrum template) runs on the default
+executor, so status replies are not held up behind an acquisition.
+
 Author: Updated for Python 3 and SpecsLab Prodigy v4.x compatibility
 Date: December 2025
 """
 
-import socketserver
+import asyncio
+import inspect
+import logging
+import os
+import socket
 import sys
 import time
 import json
-import threading
 import math
-from datetime import datetime
+import random
+import re
+from array import array
+from collections import OrderedDict
 from enum import Enum
 
 
+# Request line: "?" + 4-character request ID + one separator character,
+# then the command name and its (optional) parameters
+_COMMAND_RE = re.compile(rb'\?(.{4}).\s*(\S+)\s*(.*)')
+
+# One key:value request parameter; the value is either a double-quoted
+# string (which may contain spaces) or a run of non-space characters
+_PARAM_RE = re.compile(r'([^\s:]+):(?:"([^"]*)"|(\S*))')
+
+# Device parameter definitions (name,type,value per line), read from the
+# working directory
+PARAMETERS_FILE = 'parameters.dat'
+
+# Socket buffer size for client connections; large enough to absorb a
+# full GetAcquisitionData reply without stalling the event loop
+SOCKET_BUFFER_SIZE = 1 << 20
+
+# Values formatted per chunk of a streamed GetAcquisitionData reply
+DATA_CHUNK_VALUES = 8192
+
+# Upper bound on the memory held by cached noise-free spectrum templates
+TEMPLATE_CACHE_BYTES = 8 << 20
+
+# Per-command RX/TX traffic is logged at DEBUG so the default reply path
+# does no console I/O; set SIMULATOR_LOG_LEVEL=DEBUG to echo it
+log = logging.getLogger("prodigy")
+
+
 class AcquisitionState(Enum):
     """Acquisition state machine states per protocol spec"""
     IDLE = "idle"
@@ -38,23 +76,191 @@ class AcquisitionState(Enum):
     ERROR = "error"
 
 
-class ProdigySimHandler(socketserver.StreamRequestHandler):
+# GetAcquisitionStatus reply template per state, and whether it carries
+# NumberOfAcquiredPoints (omitted while idle/validated)
+_STATUS_REPLIES = {
+    state: (f"!%s OK: ControllerState:{state.value} NumberOfAcquiredPoints:%d", True)
+    if state not in (AcquisitionState.IDLE, AcquisitionState.VALIDATED)
+    else (f"!%s OK: ControllerState:{state.value}", False)
+    for state in AcquisitionState
+}
+
+
+def _parse_parameters(text):
+    """
+    Parse key:value parameters from the text after the command name.
+    Returns dict of {key: value}
+
+    Handles quoted values that may contain spaces:
+    ParameterName:"Detector Voltage" -> {"ParameterName": "Detector Voltage"}
+    """
+    params = {}
+    for match in _PARAM_RE.finditer(text):
+        key, quoted, unquoted = match.groups()
+        params[key] = unquoted if quoted is None else quoted
+    return params
+
+
+def _parse_float_array(text):
+    """
+    Parse the comma-separated body of a protocol array into an array('d').
+
+    map/filter keep the per-element float() calls in C; blank entries (e.g.
+    a trailing comma) are skipped.
+    """
+    return array('d', map(float, filter(str.strip, text.split(','))))
+
+
+def _gaussian_slice(out, offset, energies, spatial_offsets, center_energy, sigma):
+    """
+    Write a noise-free Gaussian peak sampled at every (energy, pixel offset)
+    pair into out, starting at offset, flattened in energy-major order.
+
+    Kept free of handler state so the inner loop only touches locals.
     """
-    TCP handler for SpecsLab Prodigy Remote In protocol.
+    exp = math.exp
+    inv_two_sigma_sq = 1.0 / (2.0 * sigma * sigma)
+    index = offset
+    for energy in energies:
+        energy_delta = energy - center_energy
+        for spatial_offset in spatial_offsets:
+            # Gaussian peak with spatial/slice variations
+            delta = energy_delta + spatial_offset
+            out[index] = 1000.0 * exp(-(delta * delta) * inv_two_sigma_sq)
+            index += 1
+
+
+def _add_noise(out, template, start, stop, uniform):
+    """
+    Copy template[start:stop] into out with realistic noise (+/-10% of the
+    signal) applied; uniform() draws from [0, 1). The template is never
+    negative, so neither is out.
+    """
+    out[start:stop] = array('d', [intensity * (0.9 + 0.2 * uniform())
+                                  for intensity in template[start:stop]])
+
+
+def _build_template(start_energy, step_width, total_samples,
+                    values_per_sample, num_slices, center_energy, sigma):
+    """
+    Build the noise-free flattened [slice][sample][value] intensities for a
+    spectrum geometry.
+
+    Touches no handler or server state, so it can run off the event loop.
+    """
+    slice_length = total_samples * values_per_sample
+    template = array('d', [0.0]) * (slice_length * num_slices)
+    vps_half = values_per_sample * 0.5
+    # For 2D/3D: add spatial/angular variation per detector pixel
+    spatial_offsets = [(val_idx - vps_half) * 0.2
+                       for val_idx in range(values_per_sample)]
+    for slice_idx in range(num_slices):
+        slice_offset = (slice_idx - num_slices * 0.5) * 0.1
+        first_energy = start_energy + slice_offset
+        energies = [first_energy + sample_idx * step_width
+                    for sample_idx in range(total_samples)]
+        _gaussian_slice(template, slice_idx * slice_length, energies,
+                        spatial_offsets, center_energy, sigma)
+    return template
+
+
+class _TemplateCache:
+    """
+    Least-recently-used cache of noise-free spectrum templates, bounded by
+    the total size of the cached arrays rather than their count.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._templates = OrderedDict()
+        self._size = 0
+
+    def get(self, key):
+        template = self._templates.get(key)
+        if template is not None:
+            self._templates.move_to_end(key)
+        return template
+
+    def put(self, key, template):
+        size = len(template) * template.itemsize
+        if size > self.max_bytes or key in self._templates:
+            return
+        self._templates[key] = template
+        self._size += size
+        while self._size > self.max_bytes:
+            _, evicted = self._templates.popitem(last=False)
+            self._size -= len(evicted) * evicted.itemsize
+
+
+class ProdigySimHandler:
+    """
+    Connection handler for SpecsLab Prodigy Remote In protocol.
     Instantiated once per client connection.
     """
     
-    def __init__(self, request, client_address, server):
-        # Initialize spectrum and acquisition state before calling parent
+    # Command name (as received, undecoded) -> (handler method name,
+    # handler takes params)
+    _COMMANDS = {
+        # Connection management commands
+        b"Connect": ("cmd_connect", False),
+        b"Disconnect": ("cmd_disconnect", False),
+
+        # Spectrum definition commands
+        b"DefineSpectrumFAT": ("cmd_define_spectrum_fat", True),
+        b"DefineSpectrumSFAT": ("cmd_define_spectrum_sfat", True),
+        b"DefineSpectrumFRR": ("cmd_define_spectrum_frr", True),
+        b"DefineSpectrumFE": ("cmd_define_spectrum_fe", True),
+        b"DefineSpectrumLVS": ("cmd_define_spectrum_lvs", True),
+
+        # Spectrum validation/check commands
+        b"CheckSpectrumFAT": ("cmd_check_spectrum_fat", True),
+        b"CheckSpectrumSFAT": ("cmd_check_spectrum_sfat", True),
+        b"CheckSpectrumFRR": ("cmd_check_spectrum_frr", True),
+        b"CheckSpectrumFE": ("cmd_check_spectrum_fe", True),
+        b"CheckSpectrumLVS": ("cmd_check_spectrum_lvs", True),
+        b"ValidateSpectrum": ("cmd_validate_spectrum", False),
+        b"ClearSpectrum": ("cmd_clear_spectrum", False),
+
+        # Acquisition control commands
+        b"Start": ("cmd_start", True),
+        b"Pause": ("cmd_pause", False),
+        b"Resume": ("cmd_resume", False),
+        b"Abort": ("cmd_abort", False),
+        b"GetAcquisitionStatus": ("cmd_get_acquisition_status", False),
+        b"WaitForAcquisitionStatus": ("cmd_wait_for_acquisition_status", True),
+        b"GetAcquisitionData": ("cmd_get_acquisition_data", True),
+        b"GetAcquisitionDataBinary": ("cmd_get_acquisition_data_binary", True),
+
+        # Device parameter commands
+        b"GetAllAnalyzerParameterNames": ("cmd_get_all_parameter_names", False),
+        b"GetAnalyzerParameterInfo": ("cmd_get_parameter_info", True),
+        b"GetAnalyzerVisibleName": ("cmd_get_analyzer_visible_name", False),
+        b"GetAnalyzerParameterValue": ("cmd_get_parameter_value", True),
+        b"SetAnalyzerParameterValue": ("cmd_set_parameter_value", True),
+    }
+    
+    def __init__(self, reader, writer, server):
+        self.reader = reader
+        self.writer = writer
+        self.server = server
+        self.client_address = writer.get_extra_info('peername')
+        
+        # Spectrum and acquisition state
         self.spectrum_defined = False
         self.spectrum_validated = False
         self.acquisition_state = AcquisitionState.IDLE
         self.acquisition_start_time = None
-        self.acquisition_thread = None
-        self.acquired_data = []
+        self.acquisition_task = None
+        self._not_paused = asyncio.Event()  # Cleared while paused
+        self._progressed = asyncio.Event()  # Set on each new energy step
+        self.acquired_data = array('d')
+        self.acquired_count = 0  # Values of acquired_data published so far
         self.acquisition_progress = 0
         self.total_samples = 0
         
+        # Noise source for simulated spectra
+        self._rng = random.Random()
+        
         # Spectrum parameters (for DefineSpectrumFAT)
         self.start_energy = 0.0
         self.end_energy = 0.0
@@ -75,77 +281,95 @@ class ProdigySimHandler(socketserver.StreamRequestHandler):
         self.num_detector_pixels = 1
         
         # Fixed acquisition mode parameters
-        self.fixed_energies = []
-        self.fixed_transmission_values = []
+        self.fixed_energies = array('d')
+        self.fixed_transmission_values = array('d')
         
         # Device parameters loaded from file
         self.device_parameters = {}
         
-        super().__init__(request, client_address, server)
+        self.setup()
     
     def setup(self):
         """Called before handle() to initialize the connection"""
-        super().setup()
-        self.load_device_parameters()
+        # Status replies are tiny; send them without waiting on Nagle
+        sock = self.writer.get_extra_info('socket')
+        if sock is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        
+        self.device_parameters = self.server.get_device_parameters()
         self.client_connected = False
-        print(f"[{datetime.now()}] Client connected from {self.client_address}")
+        log.info("Client connected from %s", self.client_address)
     
-    def load_device_parameters(self):
-        """Load device parameters from parameters.dat file"""
+    async def handle(self):
+        """
+        Main connection loop - receives and processes commands.
+
+        Every complete command line that arrived in one read is answered
+        before the buffered replies are drained, so a client that pipelines
+        requests gets its replies back in a single write.
+        """
+        pending = b""
+        debug = log.isEnabledFor(logging.DEBUG)
         try:
-            with open('parameters.dat', 'r') as f:
-                for line in f:
-                    line = line.strip()
-                    if not line:
-                        continue
-                    parts = line.split(',')
-                    if len(parts) >= 3:
-                        name = parts[0]
-                        param_type = parts[1]
-                        value = parts[2]
-                        self.device_parameters[name] = {
-                            'type': param_type,
-                            'value': value
-                        }
-            print(f"[{datetime.now()}] Loaded {len(self.device_parameters)} device parameters")
-        except FileNotFoundError:
-            print(f"[{datetime.now()}] Warning: parameters.dat not found, using empty parameter set")
-            self.device_parameters = {}
-    
-    def handle(self):
-        """Main connection loop - receives and processes commands"""
-        while True:
-            try:
-                # Read one line (command terminated by \n)
-                raw_line = self.rfile.readline()
-                if not raw_line:
+            while True:
+                chunk = await self.reader.read(65536)
+                if not chunk:
                     # Connection closed by client
                     break
                 
-                command_line = raw_line.decode('utf-8').strip()
-                if not command_line:
-                    continue
+                # Split off complete lines (commands terminated by \n)
+                lines = (pending + chunk).split(b"\n")
+                pending = lines.pop()
                 
-                print(f"[{datetime.now()}] RX: {command_line}")
-                
-                # Parse and execute command
-                response = self.parse_command(command_line)
+                # Replies are collected and handed to the transport together
+                replies = []
+                for raw_line in lines:
+                    command_line = raw_line.strip()
+                    if not command_line:
+                        continue
+                    
+                    if debug:
+                        log.debug("RX: %s", command_line.decode('utf-8', 'replace'))
+                    
+                    # Parse and execute command
+                    response = self.parse_command(command_line)
+                    if inspect.iscoroutine(response):
+                        # Reply that waits on the acquisition: send the
+                        # replies before it so the client is not held up
+                        if replies:
+                            self.writer.writelines(replies)
+                            replies = []
+                        response = await response
+                    
+                    if isinstance(response, str):
+                        log.debug("TX: %s", response)
+                        replies.append((response + "\n").encode('utf-8'))
+                    elif isinstance(response, bytes):
+                        # Pre-encoded reply (binary data payload)
+                        replies.append(response)
+                    elif response is not None:
+                        # Streamed reply: send each chunk as it is formatted
+                        if replies:
+                            self.writer.writelines(replies)
+                            replies = []
+                        for chunk in response:
+                            self.writer.write(chunk)
+                            await self.writer.drain()
                 
-                if response:
-                    print(f"[{datetime.now()}] TX: {response}")
-                    self.wfile.write((response + "\n").encode('utf-8'))
-                    self.wfile.flush()
-            
-            except ConnectionResetError:
-                print(f"[{datetime.now()}] Connection reset by client")
-                break
-            except Exception as e:
-                print(f"[{datetime.now()}] Error handling request: {e}")
-                import traceback
-                traceback.print_exc()
-                break
+                if replies:
+                    self.writer.writelines(replies)
+                await self.writer.drain()
         
-        print(f"[{datetime.now()}] Client disconnected")
+        except ConnectionResetError:
+            log.info("Connection reset by client")
+        except Exception as e:
+            log.exception("Error handling request: %s", e)
+        finally:
+            # The acquisition belongs to this connection
+            self._cancel_acquisition()
+            self.writer.close()
+        
+        log.info("Client disconnected")
     
     def parse_command(self, command_line):
         """
@@ -153,146 +377,50 @@ class ProdigySimHandler(socketserver.StreamRequestHandler):
         
         Command format: ?<id> Command [Params]
         Response format: !<id> OK[:OutParams] or !<id> Error:<code> <message>
+        
+        command_line is the raw request bytes; only the request ID and, for
+        commands that take them, the parameters are ever decoded.
         """
         if not command_line:
             return None
         
-        # Check for proper request format (starts with ?)
+        # Fast path: well-formed "?<id> Command [Params]" in a single match
+        match = _COMMAND_RE.match(command_line)
+        if match is not None:
+            req_id, command_name, rest = match.groups()
+            
+            # Route to appropriate handler
+            return self.execute_command(req_id.decode('utf-8', 'replace'), command_name, rest)
+        
+        # Malformed request - work out which error to report
+        command_line = command_line.decode('utf-8', 'replace')
         if command_line[0] != '?':
             if not self.client_connected:
                 return "!FFFF Error: 4 Unknown message format."
             return None
         
-        # Extract request ID (4 hex digits)
         if len(command_line) < 5:
             return "!FFFF Error: 4 Unknown message format."
         
-        req_id = command_line[1:5]
-        
-        # Extract command and parameters
-        if len(command_line) < 7:
-            return f"!{req_id} Error: 4 Unknown message format."
-        
-        command_part = command_line[6:]  # Skip "?<id> "
-        
-        # Parse command name and parameters
-        tokens = command_part.split()
-        if not tokens:
-            return f"!{req_id} Error: 4 Unknown message format."
-        
-        command_name = tokens[0]
-        params = self.parse_parameters(tokens[1:]) if len(tokens) > 1 else {}
-        
-        # Route to appropriate handler
-        return self.execute_command(req_id, command_name, params)
+        # Request ID present but no command after it
+        return f"!{command_line[1:5]} Error: 4 Unknown message format."
     
-    def parse_parameters(self, param_tokens):
+    def execute_command(self, req_id, command, raw_params):
         """
-        Parse key:value parameters from command tokens.
-        Returns dict of {key: value}
-        
-        Handles quoted values that may contain spaces:
-        ParameterName:"Detector Voltage" -> {"ParameterName": "Detector Voltage"}
+        Execute the requested command and return formatted response.
+
+        command and raw_params are undecoded bytes; the parameters are only
+        decoded and parsed for commands that take them.
         """
-        params = {}
-        i = 0
-        while i < len(param_tokens):
-            token = param_tokens[i]
-            
-            if ':' not in token:
-                i += 1
-                continue
-            
-            # Split on first colon only
-            key, value = token.split(':', 1)
-            
-            # If value starts with quote but doesn't end with quote,
-            # it was split by spaces - reassemble
-            if value.startswith('"') and not value.endswith('"'):
-                # Collect tokens until we find the closing quote
-                value_parts = [value]
-                i += 1
-                while i < len(param_tokens):
-                    value_parts.append(param_tokens[i])
-                    if param_tokens[i].endswith('"'):
-                        break
-                    i += 1
-                value = ' '.join(value_parts)
-            
-            # Remove quotes if present
-            if value.startswith('"') and value.endswith('"'):
-                value = value[1:-1]
-            
-            params[key] = value
-            i += 1
-        
-        return params
-    
-    def execute_command(self, req_id, command, params):
-        """Execute the requested command and return formatted response"""
+        entry = self._COMMANDS.get(command)
+        if entry is None:
+            return f"!{req_id} Error: 101 Unknown command: {command.decode('utf-8', 'replace')}"
         
-        # Connection management commands
-        if command == "Connect":
-            return self.cmd_connect(req_id)
-        elif command == "Disconnect":
-            return self.cmd_disconnect(req_id)
-        
-        # Spectrum definition commands
-        elif command == "DefineSpectrumFAT":
-            return self.cmd_define_spectrum_fat(req_id, params)
-        elif command == "DefineSpectrumSFAT":
-            return self.cmd_define_spectrum_sfat(req_id, params)
-        elif command == "DefineSpectrumFRR":
-            return self.cmd_define_spectrum_frr(req_id, params)
-        elif command == "DefineSpectrumFE":
-            return self.cmd_define_spectrum_fe(req_id, params)
-        elif command == "DefineSpectrumLVS":
-            return self.cmd_define_spectrum_lvs(req_id, params)
-        
-        # Spectrum validation/check commands
-        elif command == "CheckSpectrumFAT":
-            return self.cmd_check_spectrum_fat(req_id, params)
-        elif command == "CheckSpectrumSFAT":
-            return self.cmd_check_spectrum_sfat(req_id, params)
-        elif command == "CheckSpectrumFRR":
-            return self.cmd_check_spectrum_frr(req_id, params)
-        elif command == "CheckSpectrumFE":
-            return self.cmd_check_spectrum_fe(req_id, params)
-        elif command == "CheckSpectrumLVS":
-            return self.cmd_check_spectrum_lvs(req_id, params)
-        elif command == "ValidateSpectrum":
-            return self.cmd_validate_spectrum(req_id)
-        elif command == "ClearSpectrum":
-            return self.cmd_clear_spectrum(req_id)
-        
-        # Acquisition control commands
-        elif command == "Start":
-            return self.cmd_start(req_id, params)
-        elif command == "Pause":
-            return self.cmd_pause(req_id)
-        elif command == "Resume":
-            return self.cmd_resume(req_id)
-        elif command == "Abort":
-            return self.cmd_abort(req_id)
-        elif command == "GetAcquisitionStatus":
-            return self.cmd_get_acquisition_status(req_id)
-        elif command == "GetAcquisitionData":
-            return self.cmd_get_acquisition_data(req_id, params)
-        
-        # Device parameter commands
-        elif command == "GetAllAnalyzerParameterNames":
-            return self.cmd_get_all_parameter_names(req_id)
-        elif command == "GetAnalyzerParameterInfo":
-            return self.cmd_get_parameter_info(req_id, params)
-        elif command == "GetAnalyzerVisibleName":
-            return self.cmd_get_analyzer_visible_name(req_id)
-        elif command == "GetAnalyzerParameterValue":
-            return self.cmd_get_parameter_value(req_id, params)
-        elif command == "SetAnalyzerParameterValue":
-            return self.cmd_set_parameter_value(req_id, params)
-        
-        else:
-            return f"!{req_id} Error: 101 Unknown command: {command}"
+        method_name, takes_params = entry
+        if takes_params:
+            params = _parse_parameters(raw_params.decode('utf-8')) if raw_params else {}
+            return getattr(self, method_name)(req_id, params)
+        return getattr(self, method_name)(req_id)
     
     # ========== Connection Commands ==========
     
@@ -312,6 +440,7 @@ class ProdigySimHandler(socketserver.StreamRequestHandler):
         # Clean up any running acquisition
         if self.acquisition_state == AcquisitionState.RUNNING:
             self.acquisition_state = AcquisitionState.ABORTED
+            self._cancel_acquisition()
         
         self.client_connected = False
         return f"!{req_id} OK"
@@ -359,9 +488,9 @@ class ProdigySimHandler(socketserver.StreamRequestHandler):
             elif self.values_per_sample > 1:
                 dimension_info = f"2D ({self.total_samples}×{self.values_per_sample})"
             
-            print(f"  Spectrum defined: {self.total_samples} samples, "
-                  f"{self.start_energy}-{self.end_energy} eV, "
-                  f"step={self.step_width} eV, {dimension_info}")
+            log.info("Spectrum defined: %s samples, %s-%s eV, step=%s eV, %s",
+                     self.total_samples, self.start_energy, self.end_energy,
+                     self.step_width, dimension_info)
             
             return f"!{req_id} OK"
         
@@ -439,12 +568,12 @@ class ProdigySimHandler(socketserver.StreamRequestHandler):
             # Parse energy array: Energies:[1.0,2.0,3.0,...]
             energies_str = params.get('Energies', '[]')
             if energies_str.startswith('[') and energies_str.endswith(']'):
-                self.fixed_energies = [float(x) for x in energies_str[1:-1].split(',') if x.strip()]
+                self.fixed_energies = _parse_float_array(energies_str[1:-1])
 
             # Parse transmission array (optional)
             trans_str = params.get('TransmissionValues', '[]')
             if trans_str.startswith('[') and trans_str.endswith(']'):
-                self.fixed_transmission_values = [float(x) for x in trans_str[1:-1].split(',') if x.strip()]
+                self.fixed_transmission_values = _parse_float_array(trans_str[1:-1])
 
             self.dwell_time = float(params.get('DwellTime', 0.1))
             self.total_samples = len(self.fixed_energies)
@@ -635,7 +764,8 @@ class ProdigySimHandler(socketserver.StreamRequestHandler):
         
         self.spectrum_defined = False
         self.spectrum_validated = False
-        self.acquired_data = []
+        self.acquired_data = array('d')
+        self.acquired_count = 0
         self.acquisition_state = AcquisitionState.IDLE
         return f"!{req_id} OK"
     
@@ -649,28 +779,31 @@ class ProdigySimHandler(socketserver.StreamRequestHandler):
         if self.acquisition_state == AcquisitionState.RUNNING:
             return f"!{req_id} Error: 204 Acquisition already running."
 
-        # Wait for any previous acquisition thread to fully terminate
-        # This prevents race conditions when tests run in quick succession
-        if self.acquisition_thread is not None and self.acquisition_thread.is_alive():
-            print(f"[{datetime.now()}] Waiting for previous acquisition thread to terminate...")
-            self.acquisition_thread.join(timeout=5.0)
-            if self.acquisition_thread.is_alive():
-                print(f"[{datetime.now()}] ERROR: Previous thread still alive after 5s timeout")
-                return f"!{req_id} Error: 299 Previous acquisition still terminating, please retry."
+        # A previous task is normally already cancelled; it only runs between
+        # awaits on this loop, so it can never touch the new buffer
+        self._cancel_acquisition()
 
         # Parse optional parameters
         set_safe_state = params.get('SetSafeStateAfter', 'false').lower() == 'true'
 
-        # Start acquisition in background thread
+        # Start acquisition in background task
         self.acquisition_state = AcquisitionState.RUNNING
         self.acquisition_start_time = time.time()
         self.acquisition_progress = 0
-        self.acquired_data = []
+        # The acquisition runs on a snapshot of the spectrum geometry, so a
+        # Define sent while it runs cannot resize it under the buffer
+        geometry = (self.start_energy, self.end_energy, self.step_width,
+                    self.total_samples, self.values_per_sample, self.num_slices)
+        # Preallocate the flattened buffer; the simulation task fills it
+        # and advances acquired_count as each energy step completes
+        total_points = self.total_samples * self.values_per_sample * self.num_slices
+        self.acquired_data = array('d', [0.0]) * total_points
+        self.acquired_count = 0
 
-        # Start simulation thread
-        self.acquisition_thread = threading.Thread(target=self._simulate_acquisition)
-        self.acquisition_thread.daemon = True
-        self.acquisition_thread.start()
+        # Start simulation task
+        self._not_paused.set()
+        self.acquisition_task = asyncio.get_running_loop().create_task(
+            self._simulate_acquisition(geometry))
 
         return f"!{req_id} OK"
     
@@ -680,6 +813,7 @@ class ProdigySimHandler(socketserver.StreamRequestHandler):
             return f"!{req_id} Error: 205 No acquisition running."
         
         self.acquisition_state = AcquisitionState.PAUSED
+        self._not_paused.clear()
         return f"!{req_id} OK"
     
     def cmd_resume(self, req_id):
@@ -688,6 +822,7 @@ class ProdigySimHandler(socketserver.StreamRequestHandler):
             return f"!{req_id} Error: 206 Acquisition not paused."
         
         self.acquisition_state = AcquisitionState.RUNNING
+        self._not_paused.set()
         return f"!{req_id} OK"
     
     def cmd_abort(self, req_id):
@@ -696,19 +831,47 @@ class ProdigySimHandler(socketserver.StreamRequestHandler):
             return f"!{req_id} Error: 207 No acquisition to abort."
         
         self.acquisition_state = AcquisitionState.ABORTED
+        self._cancel_acquisition()
         return f"!{req_id} OK"
     
     def cmd_get_acquisition_status(self, req_id):
         """Get current acquisition status per protocol spec"""
         # Protocol returns: ControllerState:<state> NumberOfAcquiredPoints:<num>
         # States: idle, validated, running, paused, finished, aborted, error
-        response = f"!{req_id} OK: ControllerState:{self.acquisition_state.value}"
+        template, with_points = _STATUS_REPLIES[self.acquisition_state]
+        if with_points:
+            return template % (req_id, self.acquisition_progress)
+        return template % req_id
+    
+    async def cmd_wait_for_acquisition_status(self, req_id, params):
+        """
+        Wait for new data, then reply as GetAcquisitionStatus (simulator extension).
         
-        # Only include NumberOfAcquiredPoints if not in idle/validated state
-        if self.acquisition_state not in [AcquisitionState.IDLE, AcquisitionState.VALIDATED]:
-            response += f" NumberOfAcquiredPoints:{self.acquisition_progress}"
+        Params: AfterPoints (default: points acquired so far), Timeout
+        (seconds, default 1)
         
-        return response
+        The reply is sent once more than AfterPoints points are acquired,
+        the acquisition has ended, or Timeout has passed, so a client can
+        wait for data instead of polling the status. A paused acquisition
+        has not ended; it adds no points until resumed.
+        """
+        after_points = int(params.get('AfterPoints', self.acquisition_progress))
+        timeout = float(params.get('Timeout', 1.0))
+        
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while (self.acquisition_state in (AcquisitionState.RUNNING, AcquisitionState.PAUSED)
+               and self.acquisition_progress <= after_points):
+            self._progressed.clear()
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                await asyncio.wait_for(self._progressed.wait(), remaining)
+            except asyncio.TimeoutError:
+                break
+        
+        return self.cmd_get_acquisition_status(req_id)
     
     def cmd_get_acquisition_data(self, req_id, params):
         """
@@ -716,24 +879,78 @@ class ProdigySimHandler(socketserver.StreamRequestHandler):
         
         Params: FromIndex, ToIndex (optional, defaults to all data)
         """
+        data_range = self._parse_data_range(req_id, params)
+        if isinstance(data_range, str):
+            return data_range
+        from_index, to_index = data_range
+        
+        # Protocol spec: only return Data:[...]
+        log.debug("TX: !%s OK: Data:[%d values]", req_id, to_index - from_index + 1)
+        return self._stream_data_reply(req_id, self.acquired_data, from_index, to_index + 1)
+    
+    def cmd_get_acquisition_data_binary(self, req_id, params):
+        """
+        Get acquired data as raw little-endian float32 (simulator extension).
+        
+        Params: FromIndex, ToIndex (optional, defaults to all data)
+        
+        The reply line is followed by exactly Bytes bytes of payload:
+        !<id> OK: FromIndex:<a> ToIndex:<b> Bytes:<n> Format:float32le\n<payload>
+        Values are rounded to float32 (~7 significant digits), a third of
+        the size of the ASCII Data:[...] encoding.
+        """
+        data_range = self._parse_data_range(req_id, params)
+        if isinstance(data_range, str):
+            return data_range
+        from_index, to_index = data_range
+        
+        payload = array('f', self.acquired_data[from_index:to_index + 1])
+        if sys.byteorder != 'little':
+            payload.byteswap()
+        payload = payload.tobytes()
+        
+        header = (f"!{req_id} OK: FromIndex:{from_index} ToIndex:{to_index} "
+                  f"Bytes:{len(payload)} Format:float32le")
+        log.debug("TX: %s", header)
+        return (header + "\n").encode('utf-8') + payload
+    
+    def _parse_data_range(self, req_id, params):
+        """
+        Return the validated (FromIndex, ToIndex) of a data request, or the
+        error reply if the range is not readable.
+        """
+        acquired_count = self.acquired_count
         from_index = int(params.get('FromIndex', 0))
-        to_index = int(params.get('ToIndex', len(self.acquired_data) - 1))
+        to_index = int(params.get('ToIndex', acquired_count - 1))
         
-        # Validate indices
-        if from_index < 0 or to_index >= len(self.acquired_data):
+        # Validate indices (only values published so far are readable)
+        if from_index < 0 or to_index >= acquired_count:
             return f"!{req_id} Error: 208 Invalid data range."
         
         if from_index > to_index:
             return f"!{req_id} Error: 208 Invalid data range (from > to)."
         
-        # Extract data slice
-        data_slice = self.acquired_data[from_index:to_index + 1]
-        
-        # Format data array as [value1,value2,...]
-        data_str = '[' + ','.join(f'{v:.6f}' for v in data_slice) + ']'
-        
-        # Protocol spec: only return Data:[...]
-        return f"!{req_id} OK: Data:{data_str}"
+        return from_index, to_index
+    
+    def _stream_data_reply(self, req_id, data, start, stop):
+        """
+        Yield the encoded Data:[value1,value2,...] reply for data[start:stop]
+        in chunks of DATA_CHUNK_VALUES values, so a large reply is never
+        built as one string.
+        """
+        # The header rides with the first chunk, so a reply that fits in
+        # one chunk still goes out in a single write
+        stop = min(stop, len(data))
+        text = f"!{req_id} OK: Data:["
+        for chunk_start in range(start, stop, DATA_CHUNK_VALUES):
+            chunk = data[chunk_start:min(chunk_start + DATA_CHUNK_VALUES, stop)]
+            # One %-format pass per chunk rather than a format call per value
+            text += '%.6f,' * len(chunk) % tuple(chunk)
+            if chunk_start + DATA_CHUNK_VALUES < stop:
+                yield text.encode('utf-8')
+                text = ''
+        # The last chunk (the header alone for an empty range) closes the list
+        yield (text.rstrip(',') + ']\n').encode('utf-8')
     
     # ========== Device Parameter Commands ==========
     
@@ -788,10 +1005,47 @@ class ProdigySimHandler(socketserver.StreamRequestHandler):
     
     # ========== Acquisition Simulation ==========
     
-    def _simulate_acquisition(self):
+    async def _spectrum_template(self, geometry):
+        """
+        Return the noise-free flattened intensities for a spectrum geometry
+        (start_energy, end_energy, step_width, total_samples,
+        values_per_sample, num_slices).
+
+        The template depends only on the spectrum geometry, so repeated
+        acquisitions of the same spectrum reuse the server's cached copy
+        and only draw fresh noise. A new template is built on the default
+        executor so other clients are served while it is computed.
+        """
+        template = self.server.spectrum_templates.get(geometry)
+        if template is not None:
+            return template
+        
+        (start_energy, end_energy, step_width,
+         total_samples, values_per_sample, num_slices) = geometry
+        center_energy = (start_energy + end_energy) / 2
+        sigma = (end_energy - start_energy) / 6
+
+        # Handle single-energy case (avoid division by zero)
+        if sigma < 0.01:  # Effectively zero
+            sigma = 1.0  # Use a default width
+        
+        template = await asyncio.get_running_loop().run_in_executor(
+            None, _build_template, start_energy, step_width,
+            total_samples, values_per_sample, num_slices,
+            center_energy, sigma)
+        self.server.spectrum_templates.put(geometry, template)
+        return template
+
+    def _cancel_acquisition(self):
+        """Cancel the simulation task, if one is still running"""
+        if self.acquisition_task is not None and not self.acquisition_task.done():
+            self.acquisition_task.cancel()
+    
+    async def _simulate_acquisition(self, geometry):
         """
-        Background thread that simulates data acquisition.
-        Generates synthetic spectrum data based on defined parameters.
+        Background task that simulates data acquisition.
+        Generates synthetic spectrum data for the geometry snapshot taken
+        by Start, so a later Define does not affect it.
 
         Data is stored as a flattened 1D array following Prodigy's format:
         - 1D: [intensity0, intensity1, ...]
@@ -801,104 +1055,147 @@ class ProdigySimHandler(socketserver.StreamRequestHandler):
         Client (IOC) must reshape based on ValuesPerSample and NumberOfSlices.
         """
         try:
-            print(f"[{datetime.now()}] Starting acquisition simulation...")
+            log.info("Starting acquisition simulation...")
 
-            total_points = self.total_samples * self.values_per_sample * self.num_slices
+            _, _, _, total_samples, values_per_sample, num_slices = geometry
+            total_points = total_samples * values_per_sample * num_slices
             point_index = 0
+            template = await self._spectrum_template(geometry)
+
+            for slice_idx in range(num_slices):
+                for sample_idx in range(total_samples):
+                    # Block here while paused; Abort cancels the task
+                    await self._not_paused.wait()
 
-            for slice_idx in range(self.num_slices):
-                for sample_idx in range(self.total_samples):
-                    # Check if paused
-                    while self.acquisition_state == AcquisitionState.PAUSED:
-                        time.sleep(0.1)
-
-                    # Check if aborted
-                    if self.acquisition_state == AcquisitionState.ABORTED:
-                        print(f"[{datetime.now()}] Acquisition aborted at {point_index}/{total_points}")
-                        return
-
-                    # Calculate energy for this sample
-                    energy = self.start_energy + sample_idx * self.step_width
-                    center_energy = (self.start_energy + self.end_energy) / 2
-                    sigma = (self.end_energy - self.start_energy) / 6
-
-                    # Handle single-energy case (avoid division by zero)
-                    if sigma < 0.01:  # Effectively zero
-                        sigma = 1.0  # Use a default width
-
-                    # Generate multi-dimensional data for this energy step
-                    for val_idx in range(self.values_per_sample):
-                        # For 2D/3D: add spatial/angular variation
-                        # Simulate detector pixel or slice variation
-                        spatial_offset = (val_idx - self.values_per_sample / 2) * 0.2
-                        slice_offset = (slice_idx - self.num_slices / 2) * 0.1
-
-                        # Gaussian peak with spatial/slice variations
-                        effective_energy = energy + spatial_offset + slice_offset
-                        intensity = 1000 * math.exp(-((effective_energy - center_energy) ** 2) / (2 * sigma ** 2))
-
-                        # Add realistic noise
-                        noise = intensity * 0.1 * (hash(str(time.time() + val_idx)) % 100 - 50) / 50
-                        intensity += noise
-                        intensity = max(0, intensity)  # No negative counts
-
-                        # Add to flattened data array
-                        self.acquired_data.append(intensity)
-                        point_index += 1
+                    # Noise and publish this energy step of the flattened
+                    # data array; only one step's worth of work runs
+                    # between awaits, so other clients are never held up
+                    _add_noise(self.acquired_data, template, point_index,
+                               point_index + values_per_sample,
+                               uniform=self._rng.random)
+                    point_index += values_per_sample
+                    self.acquired_count = point_index
 
                     # Update progress (in terms of energy samples, not individual values)
-                    self.acquisition_progress = (slice_idx * self.total_samples) + sample_idx + 1
+                    self.acquisition_progress = (slice_idx * total_samples) + sample_idx + 1
+                    self._progressed.set()
 
                     # Simulate dwell time (per energy step, not per pixel)
-                    time.sleep(self.dwell_time / 10)  # Speed up for simulation (10x faster)
+                    await asyncio.sleep(self.dwell_time / 10)  # Speed up for simulation (10x faster)
 
             # Mark as finished
             if self.acquisition_state == AcquisitionState.RUNNING:
                 self.acquisition_state = AcquisitionState.FINISHED
-                shape_info = f"{self.total_samples}"
-                if self.values_per_sample > 1:
-                    shape_info += f"×{self.values_per_sample}"
-                if self.num_slices > 1:
-                    shape_info += f"×{self.num_slices}"
-                print(f"[{datetime.now()}] Acquisition completed: {total_points} total points ({shape_info})")
+                shape_info = f"{total_samples}"
+                if values_per_sample > 1:
+                    shape_info += f"×{values_per_sample}"
+                if num_slices > 1:
+                    shape_info += f"×{num_slices}"
+                log.info("Acquisition completed: %d total points (%s)", total_points, shape_info)
+        except asyncio.CancelledError:
+            log.info("Acquisition aborted at %d/%d", point_index, total_points)
+            raise
         except Exception as e:
-            print(f"[{datetime.now()}] ERROR in acquisition thread: {type(e).__name__}: {e}")
-            print(f"[{datetime.now()}] Acquisition failed at {point_index}/{total_points} points")
-            import traceback
-            traceback.print_exc()
+            log.exception("Acquisition failed at %d/%d points: %s: %s",
+                          point_index, total_points, type(e).__name__, e)
             self.acquisition_state = AcquisitionState.ABORTED
+        finally:
+            # Wake any status waiter for the final state
+            self._progressed.set()
 
 
-class ProdigySimServer(socketserver.TCPServer):
+class ProdigySimServer:
     """
     TCP server that enforces single-client connection policy.
     """
-    # Allow socket reuse to avoid "Address already in use" errors
-    allow_reuse_address = True
     
-    def __init__(self, server_address, RequestHandlerClass):
-        super().__init__(server_address, RequestHandlerClass)
-        self.client_connected = False
+    def __init__(self, server_address):
+        self.server_address = server_address
+        # Held for the lifetime of a client connection; further clients
+        # wait for it, like connections queued in a listen backlog
+        self._client_lock = asyncio.Lock()
+        
+        # Noise-free spectra shared by every connection's acquisitions
+        self.spectrum_templates = _TemplateCache(TEMPLATE_CACHE_BYTES)
+        
+        # Parsed parameters.dat, shared by every connection and reloaded
+        # only when the file's mtime changes
+        self._device_parameters = {}
+        self._parameters_mtime = None
+        self.load_device_parameters()
     
-    def verify_request(self, request, client_address):
-        """Override to enforce single-client policy"""
-        if self.client_connected:
-            print(f"[{datetime.now()}] Rejected connection from {client_address} - "
-                  f"server already has a connected client")
-            return False
+    def load_device_parameters(self):
+        """Load device parameters from parameters.dat file"""
+        device_parameters = {}
+        try:
+            self._parameters_mtime = os.stat(PARAMETERS_FILE).st_mtime_ns
+            with open(PARAMETERS_FILE, 'r') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    parts = line.split(',')
+                    if len(parts) >= 3:
+                        name = parts[0]
+                        param_type = parts[1]
+                        value = parts[2]
+                        device_parameters[name] = {
+                            'type': param_type,
+                            'value': value
+                        }
+            log.info("Loaded %d device parameters", len(device_parameters))
+        except FileNotFoundError:
+            log.warning("parameters.dat not found, using empty parameter set")
+            self._parameters_mtime = None
+        self._device_parameters = device_parameters
+    
+    def get_device_parameters(self):
+        """
+        Return a private copy of the device parameters for one connection,
+        reloading parameters.dat first if it changed since the last load.
+        """
+        try:
+            mtime = os.stat(PARAMETERS_FILE).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        if mtime != self._parameters_mtime:
+            self.load_device_parameters()
         
-        self.client_connected = True
-        return True
+        # SetAnalyzerParameterValue mutates the per-parameter dicts
+        return {name: dict(info) for name, info in self._device_parameters.items()}
     
-    def shutdown_request(self, request):
-        """Override to track disconnection"""
-        self.client_connected = False
-        super().shutdown_request(request)
+    async def _on_client(self, reader, writer):
+        """Serve one client connection once no other client is connected"""
+        client_address = writer.get_extra_info('peername')
+        if self._client_lock.locked():
+            log.info("Holding connection from %s - server already has a "
+                     "connected client", client_address)
+        
+        async with self._client_lock:
+            await ProdigySimHandler(reader, writer, self).handle()
+    
+    async def serve_forever(self):
+        """Accept and serve clients until cancelled"""
+        host, port = self.server_address
+        # Allow socket reuse to avoid "Address already in use" errors
+        server = await asyncio.start_server(
+            self._on_client, host, port, reuse_address=True)
+        # Accepted sockets inherit the listening socket's buffer sizes
+        for sock in server.sockets:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, SOCKET_BUFFER_SIZE)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SOCKET_BUFFER_SIZE)
+        async with server:
+            log.info("Server started successfully")
+            await server.serve_forever()
 
 
 def main():
     """Main entry point"""
-    import os
+    logging.basicConfig(
+        level=os.environ.get("SIMULATOR_LOG_LEVEL", "INFO").upper(),
+        format="[%(asctime)s] %(message)s",
+    )
+    
     # Use 0.0.0.0 by default to allow connections from Docker containers
     HOST = os.environ.get("SIMULATOR_BIND_HOST", "0.0.0.0")
     PORT = int(os.environ.get("SIMULATOR_PORT", "7010"))
@@ -913,17 +1210,13 @@ def main():
     print("=" * 70)
     
     try:
-        with ProdigySimServer((HOST, PORT), ProdigySimHandler) as server:
-            print(f"[{datetime.now()}] Server started successfully")
-            server.serve_forever()
+        asyncio.run(ProdigySimServer((HOST, PORT)).serve_forever())
     
     except KeyboardInterrupt:
-        print(f"\n[{datetime.now()}] Server stopped by user")
+        log.info("Server stopped by user")
         sys.exit(0)
     except Exception as e:
-        print(f"[{datetime.now()}] Server error: {e}")
-        import traceback
-        traceback.print_exc()
+        log.exception("Server error: %s", e)
         sys.exit(1)
 
 
@@ -11,23 +11,70 @@ Demonstrates:
 This is the pattern your IOC should follow.
 """
 
+import os
 import socket
 import time
 import numpy as np
 import h5py
 import json
+import re
 from datetime import datetime
 
+try:
+    # Registers the Blosc filter with HDF5; optional
+    import hdf5plugin
+except ImportError:
+    hdf5plugin = None
+
+
+def _compression_options():
+    """HDF5 filter options: Blosc/LZ4 when hdf5plugin is installed, else LZF"""
+    if hdf5plugin is not None:
+        return dict(hdf5plugin.Blosc(cname='lz4', clevel=5, shuffle=hdf5plugin.Blosc.SHUFFLE))
+    return {'compression': 'lzf', 'shuffle': True}
+
+
+# One key:value or key:"quoted value" reply parameter
+_PARAM_RE = re.compile(r'([^\s:]+):(?:"([^"]*)"|(\S*))')
+
+# Target size of an HDF5 chunk of 1D/2D intensity rows
+HDF5_CHUNK_BYTES = 1 << 20
+
+# Demo polling interval: starts short, doubles while no new data arrives
+MIN_POLL_INTERVAL = 0.005
+MAX_POLL_INTERVAL = 0.05
+
 
 class ProdigyRealtimeClient:
     """Client that collects data in real-time from Prodigy"""
     
-    def __init__(self, host='localhost', port=7010):
+    # Command name -> encoded bytes, filled on first use
+    _CMD_BYTES = {}
+    
+    def __init__(self, host='localhost', port=7010, binary_data=False,
+                 wait_for_data=False):
         self.host = host
         self.port = port
+        
+        # Fetch data with the simulator-only GetAcquisitionDataBinary
+        # command (float32, no text parsing) instead of GetAcquisitionData
+        self.binary_data = binary_data
+        # Ask for the status with the simulator-only WaitForAcquisitionStatus
+        # command, which replies once new points land, instead of polling
+        self.wait_for_data = wait_for_data
         self.sock = None
         self.request_counter = 0
         
+        # Request buffer reused by every send_command()
+        self._txbuf = bytearray()
+        
+        # Receive buffer reused by every reply; grows to fit the largest
+        # reply seen. Bytes [_rx_start:_rx_end] are received but unread.
+        self._rxbuf = bytearray(4096)
+        self._rxview = memoryview(self._rxbuf)
+        self._rx_start = 0
+        self._rx_end = 0
+        
         # Acquisition metadata
         self.start_energy = 0
         self.end_energy = 0
@@ -35,15 +82,36 @@ class ProdigyRealtimeClient:
         self.num_samples = 0
         self.values_per_sample = 1
         self.num_slices = 1
+        self.data_shape = (0,)  # Set with the geometry by define_spectrum_*
+        self._energy_axis = np.zeros(0)
         
-        # Data buffer
-        self.data_buffer = []
+        # Data buffer: flattened float64 array sized from the spectrum geometry
+        self.data_buffer = np.zeros(0, dtype=np.float64)
         self.last_read_index = -1
+        self.last_status = None  # Status seen by the latest read_new_data()
+        self._values_available = 0  # Values acquired as of last_status
+        # Data reply received but not yet parsed: (from_index, payload)
+        self._pending_data = None
+        
+        # HDF5 file the data is streamed into, when requested at start
+        self.h5_file = None
+        self.h5_intensity = None
+        # Rows of the intensity chunk being filled, written out once complete
+        self._h5_stage = None
+        self._h5_stage_block = None
+        # Name of the streamed file once it is completed and closed; the
+        # data then lives only there
+        self._streamed_to = None
     
     def connect(self):
         """Connect to Prodigy simulator"""
         self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        # Requests are small and latency-bound; data replies can be large.
+        # The receive buffer must be sized before connecting to take effect.
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 20)
         self.sock.connect((self.host, self.port))
+        self._rx_start = self._rx_end = 0
         resp = self.send_command("Connect")
         print(f"Connected: {resp}")
     
@@ -56,18 +124,109 @@ class ProdigyRealtimeClient:
     
     def send_command(self, command, params=None):
         """Send command and receive response"""
+        self._queue_request(command, params)
+        self._flush_requests()
+        return self._read_line()
+    
+    def _queue_request(self, command, params=None):
+        """
+        Append a request to the send buffer; several queued requests go out
+        together on the next _flush_requests(), and their replies arrive
+        in the same order.
+        """
         self.request_counter += 1
-        req_id = f"{self.request_counter:04X}"
         
-        request = f"?{req_id} {command}"
+        # Assemble "?<id> Command [Key:Value ...]\n" in the reused buffer
+        request = self._txbuf
+        request += b'?%04X ' % self.request_counter
+        request += self._command_bytes(command)
         if params:
-            param_str = ' '.join(f'{k}:{v}' for k, v in params.items())
-            request += f" {param_str}"
+            for key, value in params.items():
+                request += b' %s:%s' % (key.encode('utf-8'), str(value).encode('utf-8'))
+        request += b'\n'
+    
+    def _flush_requests(self):
+        """Send all queued requests in one write"""
+        self.sock.sendall(self._txbuf)
+        self._txbuf.clear()
+    
+    @classmethod
+    def _command_bytes(cls, command):
+        """Encoded command name, cached per command"""
+        encoded = cls._CMD_BYTES.get(command)
+        if encoded is None:
+            encoded = cls._CMD_BYTES[command] = command.encode('utf-8')
+        return encoded
+    
+    def _read_line(self):
+        """
+        Return the next newline-terminated reply.
         
-        self.sock.sendall((request + "\n").encode('utf-8'))
-        response = self.sock.recv(65536).decode('utf-8').strip()
+        Reads into the persistent receive buffer until a newline arrives,
+        however the reply was split into TCP segments; any bytes after the
+        newline stay buffered for the next call.
+        """
+        start, end = self._take_line()
+        return str(self._rxview[start:end], 'utf-8').strip()
+    
+    def _take_line(self):
+        """
+        Receive the next newline-terminated reply and mark it read.
         
-        return response
+        Returns its (start, end) bounds in the receive buffer, which stay
+        valid until the next receive.
+        """
+        scan_from = self._rx_start
+        while True:
+            newline = self._rxbuf.find(b'\n', scan_from, self._rx_end)
+            if newline != -1:
+                break
+            scan_from = self._rx_end - self._rx_start
+            self._receive_more()
+            scan_from += self._rx_start
+        
+        start = self._rx_start
+        self._consume(newline + 1)
+        return start, newline
+    
+    def _read_exact(self, nbytes):
+        """Return the next nbytes received bytes (e.g. a binary payload)"""
+        while self._rx_end - self._rx_start < nbytes:
+            self._receive_more()
+        
+        payload = bytes(self._rxview[self._rx_start:self._rx_start + nbytes])
+        self._consume(self._rx_start + nbytes)
+        return payload
+    
+    def _receive_more(self):
+        """
+        Receive at least one more byte into the buffer, first making room by
+        moving unread bytes to the front or, if the buffer is full of
+        them, by doubling it.
+        """
+        if self._rx_end == len(self._rxbuf):
+            if self._rx_start > 0:
+                # Move the unread bytes to the front of the buffer
+                pending = self._rx_end - self._rx_start
+                self._rxbuf[:pending] = self._rxbuf[self._rx_start:self._rx_end]
+                self._rx_start = 0
+                self._rx_end = pending
+            else:
+                # Reply larger than the buffer: double it
+                self._rxview.release()
+                self._rxbuf.extend(bytes(len(self._rxbuf)))
+                self._rxview = memoryview(self._rxbuf)
+        
+        received = self.sock.recv_into(self._rxview[self._rx_end:])
+        if not received:
+            raise ConnectionError("Connection closed by server")
+        self._rx_end += received
+    
+    def _consume(self, end):
+        """Mark buffered bytes up to end as read"""
+        self._rx_start = end
+        if self._rx_start == self._rx_end:
+            self._rx_start = self._rx_end = 0
     
     def parse_response(self, response):
         """Parse response and extract parameters"""
@@ -75,15 +234,11 @@ class ProdigyRealtimeClient:
             raise RuntimeError(f"Prodigy error: {response}")
         
         params = {}
-        if "OK:" in response:
-            parts = response.split("OK:", 1)[1].strip().split()
-            for part in parts:
-                if ':' in part:
-                    key, value = part.split(':', 1)
-                    # Remove quotes
-                    if value.startswith('"') and value.endswith('"'):
-                        value = value[1:-1]
-                    params[key] = value
+        ok = response.find("OK:")
+        if ok != -1:
+            # All pairs in one regex pass; quoted values lose their quotes
+            for key, quoted, value in _PARAM_RE.findall(response, ok + 3):
+                params[key] = quoted or value
         
         return params
     
@@ -102,12 +257,7 @@ class ProdigyRealtimeClient:
         resp = self.send_command("DefineSpectrumFAT", params)
         print(f"  {resp}")
         
-        self.start_energy = start
-        self.end_energy = end
-        self.step_width = step
-        self.values_per_sample = 1
-        self.num_slices = 1
-        self.num_samples = int((end - start) / step + 1)
+        self._set_geometry(start, end, step, 1, 1)
     
     def define_spectrum_2d(self, start, end, step, dwell, pass_energy, detector_pixels):
         """Define 2D spectrum (imaging detector or angular resolved)"""
@@ -126,12 +276,7 @@ class ProdigyRealtimeClient:
         print(f"  {resp}")
         print(f"  Data shape will be: ({int((end-start)/step+1)}, {detector_pixels})")
         
-        self.start_energy = start
-        self.end_energy = end
-        self.step_width = step
-        self.values_per_sample = values_per_sample
-        self.num_slices = 1
-        self.num_samples = int((end - start) / step + 1)
+        self._set_geometry(start, end, step, values_per_sample, 1)
     
     def define_spectrum_3d(self, start, end, step, dwell, pass_energy, detector_pixels, num_slices):
         """Define 3D spectrum (depth profiling, angle-resolved with spatial)"""
@@ -150,27 +295,56 @@ class ProdigyRealtimeClient:
         print(f"  {resp}")
         print(f"  Data shape will be: ({num_slices}, {int((end-start)/step+1)}, {detector_pixels})")
         
+        self._set_geometry(start, end, step, values_per_sample, num_slices)
+    
+    def _set_geometry(self, start, end, step, values_per_sample, num_slices):
+        """Record the defined spectrum geometry and the resulting data shape"""
         self.start_energy = start
         self.end_energy = end
         self.step_width = step
         self.values_per_sample = values_per_sample
         self.num_slices = num_slices
         self.num_samples = int((end - start) / step + 1)
+        self.data_shape = self._data_shape()
+        self._energy_axis = np.linspace(start, end, self.num_samples)
     
-    def validate_and_start(self):
-        """Validate spectrum and start acquisition"""
+    def validate_and_start(self, hdf5_filename=None):
+        """
+        Validate spectrum and start acquisition.
+        
+        With hdf5_filename, data is written to that file as it arrives
+        instead of being held in memory; finish with save_to_hdf5().
+        """
         resp = self.send_command("ValidateSpectrum")
         print(f"\nValidation: {resp}")
         
         resp = self.send_command("Start")
         print(f"Start: {resp}")
         
-        self.data_buffer = []
         self.last_read_index = -1
+        self._values_available = 0
+        self._pending_data = None
+        self._streamed_to = None
+        if hdf5_filename is not None:
+            self.data_buffer = None
+            self.h5_file = h5py.File(hdf5_filename, 'w')
+            self.h5_intensity = self._create_intensity_dataset(
+                self.h5_file, shape=self.data_shape, fillvalue=0.0)
+            chunks = self.h5_intensity.chunks
+            block_rows = chunks[1] if len(chunks) == 3 else chunks[0]
+            self._h5_stage = np.zeros((block_rows, self.values_per_sample))
+            self._h5_stage_block = None
+        else:
+            # Preallocate the whole flattened dataset; zeros stand in for
+            # values not yet acquired
+            self.data_buffer = np.zeros(int(np.prod(self.data_shape)), dtype=np.float64)
     
     def get_status(self):
         """Get current acquisition status"""
-        resp = self.send_command("GetAcquisitionStatus")
+        return self._parse_status(self.send_command("GetAcquisitionStatus"))
+    
+    def _parse_status(self, resp):
+        """Convert a GetAcquisitionStatus reply to the get_status() dict"""
         params = self.parse_response(resp)
         return {
             'status': params.get('ControllerState', '').strip('"'),
@@ -181,39 +355,179 @@ class ProdigyRealtimeClient:
         """
         Read newly acquired data since last read.
         This is the key real-time polling method.
-        """
-        status = self.get_status()
-        
-        # Calculate total data points available
-        # Each "sample" (energy step) has values_per_sample data points
-        total_values_available = status['points'] * self.values_per_sample
-        
-        if total_values_available <= self.last_read_index + 1:
-            return None  # No new data
         
-        # Read from last position to current
+        Each call is one round trip: the data announced by the previous
+        status reply is requested together with the next status, so the
+        two requests are pipelined instead of waiting on each other. The
+        data received by the previous call is parsed while the server is
+        still preparing these replies, so the values returned lag one poll
+        behind last_read_index. Once the status reads finished, any
+        remaining data is fetched and parsed at once, so a finished
+        last_status means every value has been read and returned.
+        """
+        # Data announced by the previous status but not yet read
         from_index = self.last_read_index + 1
-        to_index = total_values_available - 1
-        
-        if to_index < from_index:
-            return None
+        to_index = self._values_available - 1
+        fetch = to_index >= from_index
+        
+        if fetch:
+            self._queue_data_request(from_index, to_index)
+        if self.wait_for_data:
+            points = self._values_available // self.values_per_sample
+            self._queue_request("WaitForAcquisitionStatus", {"AfterPoints": str(points)})
+        else:
+            self._queue_request("GetAcquisitionStatus")
+        self._flush_requests()
+        
+        # Parse the previous reply while these requests are in flight
+        data_values = self._store_pending_data()
+        
+        if fetch:
+            resp, payload = self._read_data_reply()
+        # Read the queued status reply before raising on a data error, so
+        # it is not left behind to be taken as the next command's reply
+        status_resp = self._read_line()
+        if fetch:
+            self.parse_response(resp)  # Raises on error replies
+            if payload is not None:
+                self._pending_data = (from_index, payload)
+                self.last_read_index = to_index
+        status = self._parse_status(status_resp)
+        self.last_status = status
+        # Each "sample" (energy step) has values_per_sample data points
+        self._values_available = status['points'] * self.values_per_sample
         
-        resp = self.send_command("GetAcquisitionData", {
+        if status['status'] == 'finished':
+            # Collect the tail now rather than on another poll
+            if self._values_available > self.last_read_index + 1:
+                tail = self.read_new_data()
+            else:
+                tail = self._store_pending_data()
+            if data_values is None:
+                data_values = tail
+            elif tail is not None:
+                data_values = np.concatenate((data_values, tail))
+        
+        return data_values
+    
+    def _queue_data_request(self, from_index, to_index):
+        """Queue the data request for a range of values"""
+        params = {
             "FromIndex": str(from_index),
             "ToIndex": str(to_index)
-        })
+        }
+        if self.binary_data:
+            # ProdigySimServer only: little-endian float32, no text parsing
+            self._queue_request("GetAcquisitionDataBinary", params)
+        else:
+            self._queue_request("GetAcquisitionData", params)
+    
+    def _read_data_reply(self):
+        """
+        Read the reply to a queued data request. Returns (reply, payload):
+        the reply text up to the data, and the raw payload bytes or None.
         
-        params = self.parse_response(resp)
-        data_str = params.get('Data', '[]')
+        ASCII replies are never decoded as a whole: the Data:[...] bounds
+        are found in the receive buffer and only the values between the
+        brackets are copied out, for NumPy to parse straight from bytes.
+        With GetAcquisitionDataBinary the payload follows the reply line.
+        """
+        start, end = self._take_line()
+        if self.binary_data:
+            resp = str(self._rxview[start:end], 'utf-8').strip()
+            if "Bytes:" in resp:
+                return resp, self._read_exact(int(self.parse_response(resp)['Bytes']))
+            return resp, None
+        
+        data_start = self._rxbuf.find(b'Data:[', start, end)
+        data_end = self._rxbuf.rfind(b']', start, end)
+        if data_start == -1 or data_end < data_start:
+            return str(self._rxview[start:end], 'utf-8').strip(), None
+        resp = str(self._rxview[start:data_start], 'utf-8').strip()
+        return resp, bytes(self._rxview[data_start + 6:data_end])
+    
+    def _store_pending_data(self):
+        """Parse the pending data reply into the buffer (or HDF5 file) and return it"""
+        if self._pending_data is None:
+            return None
+        self._check_data_readable()
+        from_index, payload = self._pending_data
+        self._pending_data = None
         
-        # Parse data array
-        if data_str.startswith('[') and data_str.endswith(']'):
-            data_values = [float(x) for x in data_str[1:-1].split(',') if x.strip()]
-            self.data_buffer.extend(data_values)
-            self.last_read_index = to_index
-            return data_values
+        if self.binary_data:
+            data_values = np.frombuffer(payload, dtype='<f4').astype(np.float64)
+        else:
+            # Parse data array in a single C loop
+            data_values = np.fromstring(payload, dtype=np.float64, sep=',')
         
-        return None
+        if self.h5_intensity is not None:
+            self._write_hdf5_values(from_index, data_values)
+        else:
+            self.data_buffer[from_index:from_index + len(data_values)] = data_values
+        return data_values
+    
+    def _check_data_readable(self):
+        """Raise if the data was streamed to a file that is now closed"""
+        if self._streamed_to is not None:
+            raise RuntimeError(
+                f"data was streamed to {self._streamed_to}; read it from that file")
+    
+    def _data_shape(self):
+        """Shape of the full dataset for the defined spectrum"""
+        if self.num_slices > 1:
+            # 3D data
+            return (self.num_slices, self.num_samples, self.values_per_sample)
+        elif self.values_per_sample > 1:
+            # 2D data
+            return (self.num_samples, self.values_per_sample)
+        else:
+            # 1D data
+            return (self.num_samples,)
+    
+    def _write_hdf5_values(self, from_index, values):
+        """
+        Write flattened values starting at from_index into the streamed
+        intensity dataset.
+        
+        Replies always cover whole energy steps, so the values are staged
+        as (energy, detector_pixel) rows in a buffer holding one dataset
+        chunk. Data arrives in order, so each chunk is written to the file
+        in a single call once it is complete, rather than partially on
+        every poll.
+        """
+        rows = values.reshape(-1, self.values_per_sample)
+        row = from_index // self.values_per_sample
+        block_rows = len(self._h5_stage)
+        while len(rows):
+            block, first = divmod(row, block_rows)
+            if block != self._h5_stage_block:
+                self._flush_hdf5_stage()
+                self._h5_stage[:] = 0.0
+                self._h5_stage_block = block
+            count = min(len(rows), block_rows - first)
+            self._h5_stage[first:first + count] = rows[:count]
+            if first + count == block_rows:
+                self._flush_hdf5_stage()
+                self._h5_stage_block = None
+            rows = rows[count:]
+            row += count
+    
+    def _flush_hdf5_stage(self):
+        """Write the staged chunk rows, complete or not, to the dataset"""
+        block = self._h5_stage_block
+        if block is None:
+            return
+        if self.h5_intensity.ndim == 3:
+            # One chunk per energy slice
+            self.h5_intensity[block] = self._h5_stage
+            return
+        start = block * len(self._h5_stage)
+        stop = min(start + len(self._h5_stage), self.num_samples)
+        rows = self._h5_stage[:stop - start]
+        if self.h5_intensity.ndim == 2:
+            self.h5_intensity[start:stop] = rows
+        else:
+            self.h5_intensity[start:stop] = rows[:, 0]
     
     def reshape_data(self):
         """
@@ -223,65 +537,137 @@ class ProdigyRealtimeClient:
         - 1D: (num_samples,)
         - 2D: (num_samples, values_per_sample)
         - 3D: (num_slices, num_samples, values_per_sample)
-        """
-        data = np.array(self.data_buffer)
-        
-        if self.num_slices > 1:
-            # 3D data
-            expected_size = self.num_slices * self.num_samples * self.values_per_sample
-            if len(data) < expected_size:
-                # Pad with zeros if acquisition not complete
-                data = np.pad(data, (0, expected_size - len(data)), 'constant')
-            shape = (self.num_slices, self.num_samples, self.values_per_sample)
-            return data[:expected_size].reshape(shape)
-        
-        elif self.values_per_sample > 1:
-            # 2D data
-            expected_size = self.num_samples * self.values_per_sample
-            if len(data) < expected_size:
-                data = np.pad(data, (0, expected_size - len(data)), 'constant')
-            shape = (self.num_samples, self.values_per_sample)
-            return data[:expected_size].reshape(shape)
         
+        Values not yet acquired read as zero. The result is a view of the
+        preallocated buffer, so no data is copied; while streaming to HDF5
+        it is read back from the file instead. Once a streamed file is
+        completed by save_to_hdf5(), the data is only in that file and
+        RuntimeError is raised.
+        """
+        self._check_data_readable()
+        self._store_pending_data()
+        if self.h5_intensity is not None:
+            self._flush_hdf5_stage()
+            return self.h5_intensity[()]
+        return self.data_buffer.reshape(self.data_shape)
+    
+    @staticmethod
+    def _intensity_dtype(data):
+        """
+        int32 when every value is a whole number within its range (plain
+        detector counts), halving the stored size; float64 otherwise.
+        """
+        info = np.iinfo(np.int32)
+        if (data.size and info.min <= data.min() and data.max() <= info.max
+                and np.array_equal(data, np.rint(data))):
+            return np.int32
+        return np.float64
+    
+    @staticmethod
+    def _create_intensity_dataset(f, dtype=np.float64, **kwargs):
+        """
+        Create the 'intensity' dataset, chunked one energy slice at a time
+        (blocks of about HDF5_CHUNK_BYTES of energy rows for 1D/2D) and
+        compressed. An empty dataset has no sensible chunk shape, so h5py
+        picks one.
+        """
+        shape = kwargs['shape'] if 'shape' in kwargs else kwargs['data'].shape
+        if 0 in shape:
+            chunk_shape = True
+        elif len(shape) == 3:
+            chunk_shape = (1,) + tuple(shape[1:])
         else:
-            # 1D data
-            return data[:self.num_samples]
+            row_bytes = np.dtype(dtype).itemsize * (shape[1] if len(shape) == 2 else 1)
+            rows = min(max(HDF5_CHUNK_BYTES // row_bytes, 1), shape[0])
+            chunk_shape = (rows,) + tuple(shape[1:])
+        return f.create_dataset('intensity', dtype=dtype, chunks=chunk_shape,
+                                **kwargs, **_compression_options())
     
-    def save_to_hdf5(self, filename):
+    def save_to_hdf5(self, filename=None):
         """
         Save data to HDF5 format (non-proprietary).
         This is what your IOC should do.
+        
+        If the data was streamed to a file at start, that file is completed
+        and closed, and filename must be omitted; otherwise the in-memory
+        data is written to filename.
         """
-        data = self.reshape_data()
+        if self.h5_file is not None:
+            if filename is not None:
+                raise ValueError(
+                    f"data is streamed to {self.h5_file.filename}; "
+                    "save_to_hdf5() takes no filename")
+            self._store_pending_data()
+            self._flush_hdf5_stage()
+            f = self.h5_file
+            data = None
+        else:
+            if filename is None:
+                raise ValueError("save_to_hdf5() needs a filename")
+            # Build the data before creating the file, so a failure here
+            # never touches it
+            data = self.reshape_data()
+            f = h5py.File(filename, 'w')
         
-        with h5py.File(filename, 'w') as f:
-            # Create dataset
-            f.create_dataset('intensity', data=data)
+        try:
+            with f:
+                filename = f.filename
+                if data is None:
+                    intensity = self.h5_intensity
+                else:
+                    intensity = self._create_intensity_dataset(
+                        f, data=data, dtype=self._intensity_dtype(data))
+            
+                # Add metadata as attributes
+                f.attrs['start_energy'] = self.start_energy
+                f.attrs['end_energy'] = self.end_energy
+                f.attrs['step_width'] = self.step_width
+                f.attrs['num_samples'] = self.num_samples
+                f.attrs['values_per_sample'] = self.values_per_sample
+                f.attrs['num_slices'] = self.num_slices
+                f.attrs['timestamp'] = datetime.now().isoformat()
             
-            # Add metadata as attributes
-            f.attrs['start_energy'] = self.start_energy
-            f.attrs['end_energy'] = self.end_energy
-            f.attrs['step_width'] = self.step_width
-            f.attrs['num_samples'] = self.num_samples
-            f.attrs['values_per_sample'] = self.values_per_sample
-            f.attrs['num_slices'] = self.num_slices
-            f.attrs['timestamp'] = datetime.now().isoformat()
+                # Energy axis, computed when the spectrum was defined, attached
+                # to the intensity as an HDF5 dimension scale
+                energy = f.create_dataset('energy', data=self._energy_axis)
+                energy.make_scale('energy_eV')
+                energy_dim = 1 if intensity.ndim == 3 else 0
+                intensity.dims[energy_dim].attach_scale(energy)
+                intensity.dims[energy_dim].label = 'energy'
             
-            # Create energy axis
-            energy_axis = np.linspace(self.start_energy, self.end_energy, self.num_samples)
-            f.create_dataset('energy', data=energy_axis)
+                # Add dimension labels
+                if intensity.ndim == 1:
+                    f.attrs['dimensions'] = '1D: [energy]'
+                elif intensity.ndim == 2:
+                    f.attrs['dimensions'] = '2D: [energy, detector_pixel]'
+                    intensity.dims[1].label = 'detector_pixel'
+                elif intensity.ndim == 3:
+                    f.attrs['dimensions'] = '3D: [slice, energy, detector_pixel]'
+                    slices = f.create_dataset('slice', data=np.arange(self.num_slices))
+                    slices.make_scale('slice')
+                    intensity.dims[0].attach_scale(slices)
+                    intensity.dims[0].label = 'slice'
+                    intensity.dims[2].label = 'detector_pixel'
             
-            # Add dimension labels
-            if data.ndim == 1:
-                f.attrs['dimensions'] = '1D: [energy]'
-            elif data.ndim == 2:
-                f.attrs['dimensions'] = '2D: [energy, detector_pixel]'
-            elif data.ndim == 3:
-                f.attrs['dimensions'] = '3D: [slice, energy, detector_pixel]'
+                shape = intensity.shape
+                nbytes = intensity.size * intensity.dtype.itemsize
+        except BaseException:
+            # A failed in-memory save must not leave a partial file behind;
+            # a streamed file is kept, as it holds the only copy of the data
+            if data is not None:
+                os.remove(filename)
+            raise
+        
+        if data is None:
+            self._streamed_to = filename
+        self.h5_file = None
+        self.h5_intensity = None
+        self._h5_stage = None
+        self._h5_stage_block = None
         
         print(f"\nSaved to HDF5: {filename}")
-        print(f"  Shape: {data.shape}")
-        print(f"  Size: {data.nbytes / 1024:.1f} KB")
+        print(f"  Shape: {shape}")
+        print(f"  Size: {nbytes / 1024:.1f} KB")
 
 
 def demo_1d_realtime():
@@ -302,29 +688,38 @@ def demo_1d_realtime():
         pass_energy=20.0
     )
     
-    client.validate_and_start()
+    client.validate_and_start(hdf5_filename='demo_1d_spectrum.h5')
     
     # Poll for data in real-time
     print("\nCollecting data in real-time...")
+    poll_interval = MIN_POLL_INTERVAL
     while True:
         new_data = client.read_new_data()
-        if new_data:
-            status = client.get_status()
+        status = client.last_status
+        if new_data is not None:
             print(f"  Got {len(new_data)} new points, "
-                  f"total: {len(client.data_buffer)}, status: {status['status']}")
+                  f"total: {client.last_read_index + 1}, status: {status['status']}")
         
-        status = client.get_status()
+        # read_new_data() fetched everything up to this status, so a
+        # finished status means the whole dataset is in
         if status['status'] == 'finished':
             print("\n✓ Acquisition completed!")
             break
         
-        time.sleep(0.2)
+        # Back off while nothing new arrives; poll quickly again once it
+        # does. With wait_for_data the server already waits for new points.
+        if new_data is None and not client.wait_for_data:
+            time.sleep(poll_interval)
+            poll_interval = min(poll_interval * 2, MAX_POLL_INTERVAL)
+        else:
+            poll_interval = MIN_POLL_INTERVAL
+    
+    data = client.reshape_data()
     
-    # Save to HDF5
-    client.save_to_hdf5('demo_1d_spectrum.h5')
+    # Complete the streamed HDF5 file
+    client.save_to_hdf5()
     
     # Show sample data
-    data = client.reshape_data()
     print(f"\nSample data (first 5 points):")
     for i in range(min(5, len(data))):
         energy = client.start_energy + i * client.step_width
@@ -352,29 +747,38 @@ def demo_2d_realtime():
         detector_pixels=16
     )
     
-    client.validate_and_start()
+    client.validate_and_start(hdf5_filename='demo_2d_spectrum.h5')
     
     # Poll for data
     print("\nCollecting 2D data in real-time...")
+    poll_interval = MIN_POLL_INTERVAL
     while True:
         new_data = client.read_new_data()
-        if new_data:
-            status = client.get_status()
+        status = client.last_status
+        if new_data is not None:
             print(f"  Got {len(new_data)} new values, "
-                  f"total: {len(client.data_buffer)}, status: {status['status']}")
+                  f"total: {client.last_read_index + 1}, status: {status['status']}")
         
-        status = client.get_status()
+        # read_new_data() fetched everything up to this status, so a
+        # finished status means the whole dataset is in
         if status['status'] == 'finished':
             print("\n✓ Acquisition completed!")
             break
         
-        time.sleep(0.1)
+        # Back off while nothing new arrives; poll quickly again once it
+        # does. With wait_for_data the server already waits for new points.
+        if new_data is None and not client.wait_for_data:
+            time.sleep(poll_interval)
+            poll_interval = min(poll_interval * 2, MAX_POLL_INTERVAL)
+        else:
+            poll_interval = MIN_POLL_INTERVAL
+    
+    data = client.reshape_data()
     
-    # Save to HDF5
-    client.save_to_hdf5('demo_2d_spectrum.h5')
+    # Complete the streamed HDF5 file
+    client.save_to_hdf5()
     
     # Show structure
-    data = client.reshape_data()
     print(f"\n2D Data structure:")
     print(f"  Shape: {data.shape} (energy × detector_pixels)")
     print(f"  Energy range: {client.start_energy} - {client.end_energy} eV")
@@ -403,29 +807,38 @@ def demo_3d_realtime():
         num_slices=4
     )
     
-    client.validate_and_start()
+    client.validate_and_start(hdf5_filename='demo_3d_spectrum.h5')
     
     # Poll for data
     print("\nCollecting 3D data in real-time...")
+    poll_interval = MIN_POLL_INTERVAL
     while True:
         new_data = client.read_new_data()
-        if new_data:
-            status = client.get_status()
+        status = client.last_status
+        if new_data is not None:
             print(f"  Got {len(new_data)} new values, "
-                  f"total: {len(client.data_buffer)}, status: {status['status']}")
+                  f"total: {client.last_read_index + 1}, status: {status['status']}")
         
-        status = client.get_status()
+        # read_new_data() fetched everything up to this status, so a
+        # finished status means the whole dataset is in
         if status['status'] == 'finished':
             print("\n✓ Acquisition completed!")
             break
         
-        time.sleep(0.1)
+        # Back off while nothing new arrives; poll quickly again once it
+        # does. With wait_for_data the server already waits for new points.
+        if new_data is None and not client.wait_for_data:
+            time.sleep(poll_interval)
+            poll_interval = min(poll_interval * 2, MAX_POLL_INTERVAL)
+        else:
+            poll_interval = MIN_POLL_INTERVAL
     
-    # Save to HDF5
-    client.save_to_hdf5('demo_3d_spectrum.h5')
+    data = client.reshape_data()
+    
+    # Complete the streamed HDF5 file
+    client.save_to_hdf5()
     
     # Show structure
-    data = client.reshape_data()
     print(f"\n3D Data structure:")
     print(f"  Shape: {data.shape} (slices × energy × detector_pixels)")
     print(f"  Total data points: {data.size}")
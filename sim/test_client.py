@@ -126,10 +126,10 @@ class ProdigyTestClient:
         # 8. Wait for completion (or timeout)
         print("--- Test 8: Wait for Completion ---")
         timeout = 30
-        start_time = time.time()
-        while time.time() - start_time < timeout:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
             resp = self.send_command("GetAcquisitionStatus")
-            if "completed" in resp:
+            if "finished" in resp:
                 print("✓ Acquisition completed\n")
                 break
             time.sleep(1)
@@ -8,13 +8,16 @@ Provides shared fixtures for:
 
 Environment Variables:
 - SIMULATOR_HOST: Hostname for simulator (default: localhost)
-- SIMULATOR_PORT: Port for simulator (default: 7010)
+- SIMULATOR_PORT: Port for simulator (default: 7010, offset by the
+  pytest-xdist worker number when running in parallel)
 - USE_EXTERNAL_SIMULATOR: If "1", don't start local simulator
 - EPICS_IOC_PREFIX: PV prefix for EPICS IOC tests (default: KREIOS:cam1:)
 """
 
 import asyncio
+import functools
 import os
+import re
 import socket
 import subprocess
 import sys
@@ -22,7 +25,9 @@ import time
 import threading
 from contextlib import contextmanager
 from pathlib import Path
+from types import MappingProxyType
 
+import numpy as np
 import pytest
 
 # Add project paths to import from
@@ -33,6 +38,15 @@ sys.path.insert(0, str(PROJECT_ROOT / "sim"))
 SIMULATOR_HOST = os.environ.get("SIMULATOR_HOST", "localhost")
 SIMULATOR_PORT = int(os.environ.get("SIMULATOR_PORT", "7010"))
 USE_EXTERNAL_SIMULATOR = os.environ.get("USE_EXTERNAL_SIMULATOR", "0") == "1"
+
+# Under pytest-xdist each worker (gw0, gw1, ...) runs its own local simulator
+# on its own port. The port is exported for helpers that read the
+# environment, keeping the base so that re-importing this module is harmless.
+_XDIST_WORKER = os.environ.get("PYTEST_XDIST_WORKER", "")
+if _XDIST_WORKER.startswith("gw") and not USE_EXTERNAL_SIMULATOR:
+    os.environ.setdefault("SIMULATOR_BASE_PORT", str(SIMULATOR_PORT))
+    SIMULATOR_PORT = int(os.environ["SIMULATOR_BASE_PORT"]) + int(_XDIST_WORKER[2:])
+    os.environ["SIMULATOR_PORT"] = str(SIMULATOR_PORT)
 EPICS_IOC_PREFIX = os.environ.get("EPICS_IOC_PREFIX", "KREIOS:cam1:")
 
 
@@ -47,40 +61,34 @@ class SimulatorProcess:
         self.host = host or SIMULATOR_HOST
         self.port = port or SIMULATOR_PORT
         self.process = None
-        self._original_dir = None
         self._external = USE_EXTERNAL_SIMULATOR
 
     def start(self, timeout=5.0):
         """Start the simulator subprocess (or verify external simulator is running)."""
         if self._external:
             # Using external simulator (e.g., in Docker)
-            start_time = time.time()
-            while time.time() - start_time < timeout:
-                if self._is_port_open():
-                    return True
-                time.sleep(0.1)
+            if self._wait_for_port(timeout):
+                return True
             raise RuntimeError(
                 f"External simulator at {self.host}:{self.port} not responding"
             )
 
         # Start local simulator
         sim_path = PROJECT_ROOT / "sim"
-        self._original_dir = os.getcwd()
-        os.chdir(sim_path)
 
         self.process = subprocess.Popen(
             [sys.executable, "ProdigySimServer.py"],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
+            # Output is never read; a pipe would fill up over a long-lived
+            # session simulator and block it
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
             cwd=str(sim_path),
+            env={**os.environ, "SIMULATOR_PORT": str(self.port)},
         )
 
         # Wait for server to be ready
-        start_time = time.time()
-        while time.time() - start_time < timeout:
-            if self._is_port_open():
-                return True
-            time.sleep(0.1)
+        if self._wait_for_port(timeout):
+            return True
 
         self.stop()
         raise RuntimeError(f"Simulator failed to start within {timeout}s")
@@ -99,8 +107,49 @@ class SimulatorProcess:
                 self.process.kill()
             self.process = None
 
-        if self._original_dir:
-            os.chdir(self._original_dir)
+    def warm_up(self, timeout=5.0):
+        """
+        Run one throwaway acquisition, so that first-use costs in the
+        simulator (connection setup, data generation, reply formatting)
+        are not charged to whichever test happens to run first.
+        """
+        client = ProdigyTestClient(self.host, self.port)
+        client.connect()
+        try:
+            client.send_command("Connect")
+            client.send_template(DEFINE_FAT_5_SAMPLES)
+            client.send_command("ValidateSpectrum")
+            client.send_command("Start")
+            wait_for_acquisition_complete(client, timeout=timeout)
+            client.send_command("GetAcquisitionData")
+            client.send_command("Disconnect")
+        finally:
+            client.disconnect()
+
+    def is_running(self):
+        """Check whether the simulator is still available."""
+        if self._external:
+            return True
+        return self.process is not None and self.process.poll() is None
+
+    def _wait_for_port(self, timeout):
+        """
+        Poll until the simulator port accepts connections.
+
+        Starts polling at 1 ms and backs off to 100 ms, so a fast start is
+        noticed almost immediately. Gives up early if the local simulator
+        process exits.
+        """
+        deadline = time.monotonic() + timeout
+        delay = 0.001
+        while time.monotonic() < deadline:
+            if self._is_port_open():
+                return True
+            if self.process is not None and self.process.poll() is not None:
+                return False
+            time.sleep(delay)
+            delay = min(delay * 2, 0.1)
+        return False
 
     def _is_port_open(self):
         """Check if the simulator port is accepting connections."""
@@ -114,29 +163,42 @@ class SimulatorProcess:
             return False
 
 
-@pytest.fixture(scope="function")
-def simulator():
+@pytest.fixture(scope="session")
+def session_simulator():
     """
-    Fixture that starts the Prodigy simulator for each test.
+    Session-scoped simulator shared by all tests.
 
-    Yields the SimulatorProcess instance.
-    Automatically stops simulator after test.
+    Each connection gets fresh acquisition state in the simulator, so tests
+    are isolated by the per-test client connection rather than by a new
+    simulator process.
     """
     sim = SimulatorProcess()
     sim.start()
+    sim.warm_up()
     yield sim
     sim.stop()
 
 
+@pytest.fixture
+def simulator(session_simulator):
+    """
+    Fixture that provides the running Prodigy simulator for a test.
+
+    Yields the shared SimulatorProcess instance, restarting it first if an
+    earlier test stopped it.
+    """
+    if not session_simulator.is_running():
+        session_simulator.stop()
+        session_simulator.start()
+    yield session_simulator
+
+
 @pytest.fixture(scope="module")
-def simulator_module():
+def simulator_module(session_simulator):
     """
     Module-scoped simulator fixture for tests that need long-running simulator.
     """
-    sim = SimulatorProcess()
-    sim.start()
-    yield sim
-    sim.stop()
+    yield session_simulator
 
 
 # ============================================================================
@@ -151,12 +213,20 @@ class ProdigyTestClient:
         self.port = port or SIMULATOR_PORT
         self.sock = None
         self.request_counter = 0
+        # Receive buffer reused for every reply; bytes [_rx_start:_rx_end]
+        # are received but not yet returned
+        self._rxbuf = bytearray(65536)
+        self._rx_start = 0
+        self._rx_end = 0
 
     def connect(self, timeout=5.0):
         """Connect to the simulator."""
         self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 20)
         self.sock.settimeout(timeout)
         self.sock.connect((self.host, self.port))
+        self._rx_start = self._rx_end = 0
 
     def disconnect(self):
         """Disconnect from server."""
@@ -183,27 +253,170 @@ class ProdigyTestClient:
             raise RuntimeError("Not connected")
 
         # Build request
-        self.request_counter = (self.request_counter + 1) % 10000
-        req_id = f"{self.request_counter:04X}"
-
-        request = f"?{req_id} {command}"
-        if params:
-            for key, value in params.items():
-                if isinstance(value, str) and " " in value:
-                    request += f' {key}:"{value}"'
-                else:
-                    request += f" {key}:{value}"
-        request += "\n"
+        _, request = self._format_request(command, params)
 
         # Send
         self.sock.sendall(request.encode("utf-8"))
 
         # Receive
         self.sock.settimeout(timeout)
-        response = self.sock.recv(65536).decode("utf-8").strip()
+        response = self._read_line().decode("utf-8").strip()
 
         return response
 
+    def send_command_binary(self, command, params=None, timeout=10.0):
+        """
+        Send a command whose reply line may be followed by a binary payload
+        (e.g. GetAcquisitionDataBinary) and return both.
+
+        The payload length comes from the reply's Bytes:<n> field; an error
+        reply has no payload.
+
+        Returns:
+            (response string, payload bytes)
+        """
+        if not self.sock:
+            raise RuntimeError("Not connected")
+
+        _, request = self._format_request(command, params)
+        self.sock.sendall(request.encode("utf-8"))
+
+        self.sock.settimeout(timeout)
+        response = self._read_line().decode("utf-8").strip()
+        match = _BYTES_RE.search(response)
+        payload = self._read_exact(int(match.group(1))) if match else b""
+        return response, payload
+
+    def send_batch(self, commands, timeout=10.0):
+        """
+        Send several commands in a single write and return their responses.
+
+        Args:
+            commands: List of (command, params) tuples; params may be None
+            timeout: Response timeout in seconds
+
+        Returns:
+            List of response strings, in the order of commands (None for a
+            command whose reply was cut off by the server closing the
+            connection)
+
+        Raises:
+            socket.timeout: If a reply does not arrive within timeout
+        """
+        if not self.sock:
+            raise RuntimeError("Not connected")
+
+        req_ids = []
+        requests = []
+        for command, params in commands:
+            req_id, request = self._format_request(command, params)
+            req_ids.append(req_id)
+            requests.append(request.encode("utf-8"))
+        self._send_buffers(requests)
+
+        # Read a reply line per request, matching replies to requests by ID
+        self.sock.settimeout(timeout)
+        responses = {}
+        for _ in commands:
+            line = self._read_line().decode("utf-8").strip()
+            if not line:
+                break
+            if line.startswith("!"):
+                responses[line[1:5]] = line
+        return [responses.get(req_id) for req_id in req_ids]
+
+    def _send_buffers(self, buffers):
+        """
+        Send several buffers with scatter-gather sendmsg() calls, without
+        joining them into one bytes object first.
+        """
+        buffers = [memoryview(buf) for buf in buffers]
+        while buffers:
+            sent = self.sock.sendmsg(buffers)
+            # Drop what the kernel took; a partial send leaves the rest
+            while buffers and sent >= len(buffers[0]):
+                sent -= len(buffers[0])
+                buffers.pop(0)
+            if buffers and sent:
+                buffers[0] = buffers[0][sent:]
+
+    def _read_line(self):
+        """
+        Return the next reply line (without the newline) from the receive
+        buffer, receiving into it as needed. Returns whatever was left,
+        possibly b"", if the server closes the connection.
+        """
+        while True:
+            end = self._rxbuf.find(b"\n", self._rx_start, self._rx_end)
+            if end != -1:
+                line = bytes(self._rxbuf[self._rx_start:end])
+                self._rx_start = end + 1
+                return line
+
+            if self._rx_end == len(self._rxbuf):
+                if self._rx_start > 0:
+                    # Move the unread bytes to the front of the buffer
+                    pending = self._rx_end - self._rx_start
+                    self._rxbuf[:pending] = self._rxbuf[self._rx_start:self._rx_end]
+                    self._rx_start = 0
+                    self._rx_end = pending
+                else:
+                    # Line longer than the buffer: double it
+                    self._rxbuf.extend(bytes(len(self._rxbuf)))
+
+            with memoryview(self._rxbuf) as view:
+                received = self.sock.recv_into(view[self._rx_end:])
+            if not received:
+                line = bytes(self._rxbuf[self._rx_start:self._rx_end])
+                self._rx_start = self._rx_end = 0
+                return line
+            self._rx_end += received
+
+    def _read_exact(self, n_bytes):
+        """
+        Return exactly n_bytes from the receive buffer, receiving the rest
+        straight into the result.
+        """
+        available = self._rx_end - self._rx_start
+        if available >= n_bytes:
+            data = bytes(self._rxbuf[self._rx_start:self._rx_start + n_bytes])
+            self._rx_start += n_bytes
+            return data
+
+        data = bytearray(n_bytes)
+        data[:available] = self._rxbuf[self._rx_start:self._rx_end]
+        self._rx_start = self._rx_end = 0
+        pos = available
+        with memoryview(data) as view:
+            while pos < n_bytes:
+                received = self.sock.recv_into(view[pos:])
+                if not received:
+                    raise ConnectionError(
+                        f"Connection closed after {pos} of {n_bytes} payload bytes")
+                pos += received
+        return bytes(data)
+
+    def _format_request(self, command, params):
+        """Return (request ID, request line) for a command."""
+        self.request_counter = (self.request_counter + 1) % 10000
+        req_id = f"{self.request_counter:04X}"
+
+        return req_id, f"?{req_id} {command}{_format_params(params)}\n"
+
+    def send_template(self, template, timeout=10.0):
+        """
+        Send a request built by build_request_template() and return the
+        response. Only the request ID is added to the preformatted bytes.
+        """
+        if not self.sock:
+            raise RuntimeError("Not connected")
+
+        self.request_counter = (self.request_counter + 1) % 10000
+        self.sock.sendall(b"?%04X" % self.request_counter + template)
+
+        self.sock.settimeout(timeout)
+        return self._read_line().decode("utf-8").strip()
+
     def send_raw(self, raw_message, timeout=10.0):
         """Send a raw message string (for protocol testing)."""
         if not self.sock:
@@ -231,25 +444,9 @@ def client(simulator):
     client.connect()
     yield client
 
-    # Cleanup: Ensure proper state reset between tests
-    try:
-        # Abort any running acquisition
-        client.send_command("Abort", timeout=1.0)
-    except Exception:
-        pass  # May fail if no acquisition running
-
-    try:
-        # Give acquisition thread time to fully terminate
-        time.sleep(0.2)
-    except Exception:
-        pass
-
-    try:
-        # Disconnect cleanly
-        client.send_command("Disconnect", timeout=1.0)
-    except Exception:
-        pass  # May fail if already disconnected
-
+    # The simulator keeps spectrum and acquisition state per connection and
+    # cancels any acquisition when the connection closes, so closing the
+    # socket is all the reset the next test needs
     client.disconnect()
 
 
@@ -279,52 +476,45 @@ def event_loop():
 # Test Data Fixtures
 # ============================================================================
 
-@pytest.fixture
+# Read-only so the fixtures can hand every test the same mapping
+SPECTRUM_PARAMS_1D = MappingProxyType({
+    "StartEnergy": 400.0,
+    "EndEnergy": 410.0,
+    "StepWidth": 0.5,
+    "DwellTime": 0.1,
+    "PassEnergy": 20.0,
+    "LensMode": "HighMagnification",
+    "ScanRange": "MediumArea",
+    "ValuesPerSample": 1,
+    "NumberOfSlices": 1,
+})
+SPECTRUM_PARAMS_2D = MappingProxyType({
+    **SPECTRUM_PARAMS_1D,
+    "ValuesPerSample": 128,  # Detector pixels
+})
+SPECTRUM_PARAMS_3D = MappingProxyType({
+    **SPECTRUM_PARAMS_1D,
+    "ValuesPerSample": 64,  # Detector pixels
+    "NumberOfSlices": 5,  # Depth slices
+})
+
+
+@pytest.fixture(scope="session")
 def spectrum_params_1d():
-    """Standard 1D spectrum parameters."""
-    return {
-        "StartEnergy": 400.0,
-        "EndEnergy": 410.0,
-        "StepWidth": 0.5,
-        "DwellTime": 0.1,
-        "PassEnergy": 20.0,
-        "LensMode": "HighMagnification",
-        "ScanRange": "MediumArea",
-        "ValuesPerSample": 1,
-        "NumberOfSlices": 1,
-    }
+    """Standard 1D spectrum parameters (read-only)."""
+    return SPECTRUM_PARAMS_1D
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def spectrum_params_2d():
-    """Standard 2D spectrum parameters (energy x detector pixels)."""
-    return {
-        "StartEnergy": 400.0,
-        "EndEnergy": 410.0,
-        "StepWidth": 0.5,
-        "DwellTime": 0.1,
-        "PassEnergy": 20.0,
-        "LensMode": "HighMagnification",
-        "ScanRange": "MediumArea",
-        "ValuesPerSample": 128,  # Detector pixels
-        "NumberOfSlices": 1,
-    }
+    """Standard 2D spectrum parameters (energy x detector pixels, read-only)."""
+    return SPECTRUM_PARAMS_2D
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def spectrum_params_3d():
-    """Standard 3D spectrum parameters (slices x energy x pixels)."""
-    return {
-        "StartEnergy": 400.0,
-        "EndEnergy": 410.0,
-        "StepWidth": 0.5,
-        "DwellTime": 0.1,
-        "PassEnergy": 20.0,
-        "LensMode": "HighMagnification",
-        "ScanRange": "MediumArea",
-        "ValuesPerSample": 64,  # Detector pixels
-        "NumberOfSlices": 5,  # Depth slices
-    }
+    """Standard 3D spectrum parameters (slices x energy x pixels, read-only)."""
+    return SPECTRUM_PARAMS_3D
 
 
 @pytest.fixture
@@ -337,16 +527,92 @@ def expected_num_samples():
 # Helper Functions
 # ============================================================================
 
+# One key:value or key:"quoted value" response parameter
+_PARAM_RE = re.compile(r'([^\s:]+):(?:"([^"]*)"|(\S*))')
+_DATA_RE = re.compile(r"Data:\[([^\]]*)\]")
+_POINTS_RE = re.compile(r"NumberOfAcquiredPoints:(\d+)")
+_STATE_RE = re.compile(r"ControllerState:(\w+)")
+_BYTES_RE = re.compile(r"Bytes:(\d+)")
+
+
+def _format_params(params):
+    """Format request parameters as ' Key:value' pairs (quoted if spaced)."""
+    text = ""
+    if params:
+        for key, value in params.items():
+            if isinstance(value, str) and " " in value:
+                text += f' {key}:"{value}"'
+            else:
+                text += f" {key}:{value}"
+    return text
+
+
+def build_request_template(command, params=None):
+    """
+    Format a request once, without its request ID, for
+    ProdigyTestClient.send_template().
+    """
+    return f" {command}{_format_params(params)}\n".encode("utf-8")
+
+
+# Spectrum definitions shared by many tests, formatted once at import
+DEFINE_FAT_5_SAMPLES = build_request_template("DefineSpectrumFAT", {
+    "StartEnergy": 400.0,
+    "EndEnergy": 402.0,
+    "StepWidth": 0.5,
+    "DwellTime": 0.01,
+    "PassEnergy": 20.0,
+})
+DEFINE_FAT_21_SAMPLES = build_request_template("DefineSpectrumFAT", {
+    "StartEnergy": 400.0,
+    "EndEnergy": 410.0,
+    "StepWidth": 0.5,
+    "DwellTime": 0.1,
+    "PassEnergy": 20.0,
+})
+
+
+def extract_data(response):
+    """Return the values of a Data:[...] response as a float64 NumPy array."""
+    match = _DATA_RE.search(response)
+    if match is None:
+        raise ValueError(f"No Data:[...] in response: {response[:80]}")
+    # Parsed in a single C loop rather than a float() call per value
+    return np.fromstring(match.group(1), dtype=np.float64, sep=",")
+
+
+def extract_points(response):
+    """Return NumberOfAcquiredPoints from a status response (None if absent)."""
+    match = _POINTS_RE.search(response)
+    return int(match.group(1)) if match else None
+
+
+def extract_state(response):
+    """Return ControllerState from a status response (None if absent)."""
+    match = _STATE_RE.search(response)
+    return match.group(1) if match else None
+
+
 def parse_response(response):
     """
     Parse a Prodigy protocol response.
 
+    Identical responses, such as repeated status polls, are parsed only
+    once; every call still gets its own copy of the result.
+
     Args:
         response: Response string like "!0001 OK: Param1:value1 Param2:value2"
 
     Returns:
         dict with 'id', 'status', 'params', 'error_code', 'error_message'
     """
+    result = _parse_response_cached(response)
+    return dict(result, params=dict(result["params"]))
+
+
+@functools.lru_cache(maxsize=1024)
+def _parse_response_cached(response):
+    """Parse a response into a dict that callers must not modify."""
     result = {
         "id": None,
         "status": None,
@@ -375,23 +641,12 @@ def parse_response(response):
     if " OK" in response:
         result["status"] = "OK"
 
-        # Check for parameters after OK:
-        if " OK:" in response:
-            param_part = response.split(" OK:")[1].strip()
-            # Parse key:value pairs (simplified parsing)
-            tokens = param_part.split()
-            i = 0
-            while i < len(tokens):
-                token = tokens[i]
-                if ":" in token:
-                    key, value = token.split(":", 1)
-                    # Handle quoted values
-                    if value.startswith('"') and not value.endswith('"'):
-                        while i + 1 < len(tokens) and not tokens[i].endswith('"'):
-                            i += 1
-                            value += " " + tokens[i]
-                    result["params"][key] = value.strip('"')
-                i += 1
+        # Parse key:value pairs after OK: in a single pass
+        ok = response.find(" OK:")
+        if ok != -1:
+            for match in _PARAM_RE.finditer(response, ok + 4):
+                key, quoted, value = match.groups()
+                result["params"][key] = quoted if quoted is not None else value
 
     return result
 
@@ -400,21 +655,59 @@ def wait_for_acquisition_complete(client, timeout=30.0, poll_interval=0.5):
     """
     Wait for acquisition to complete.
 
+    Blocks in the simulator's WaitForAcquisitionStatus, which replies as
+    soon as the acquisition ends instead of being polled.
+
     Args:
         client: ProdigyTestClient instance
         timeout: Maximum wait time
-        poll_interval: Time between status polls
+        poll_interval: Time between status requests while no acquisition
+            is in progress (e.g. never started)
 
     Returns:
         Final status response
     """
-    start_time = time.time()
-    while time.time() - start_time < timeout:
-        response = client.send_command("GetAcquisitionStatus")
-        if "finished" in response.lower() or "aborted" in response.lower():
+    deadline = time.monotonic() + timeout
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError(f"Acquisition did not complete within {timeout}s")
+        # No acquisition reaches this many points, so only the end of the
+        # acquisition (or the timeout) produces the reply
+        response = client.send_command("WaitForAcquisitionStatus", {
+            "AfterPoints": 2**31 - 1,
+            "Timeout": f"{remaining:.3f}",
+        }, timeout=remaining + 5.0)
+        state = extract_state(response)
+        if state in ("finished", "aborted"):
             return response
-        time.sleep(poll_interval)
-    raise TimeoutError(f"Acquisition did not complete within {timeout}s")
+        if state not in ("running", "paused"):
+            time.sleep(poll_interval)
+
+
+def wait_for_points(client, after_points=0, timeout=5.0):
+    """
+    Wait until more than after_points points are acquired.
+
+    Blocks in the simulator's WaitForAcquisitionStatus instead of sleeping
+    for a fixed time. It also returns when the acquisition ends or stays
+    paused until the timeout, so a paused acquisition yields its unchanged
+    count after timeout seconds.
+
+    Args:
+        client: ProdigyTestClient instance
+        after_points: Point count to wait past
+        timeout: Maximum wait time in seconds
+
+    Returns:
+        Number of acquired points (0 if not reported)
+    """
+    response = client.send_command("WaitForAcquisitionStatus", {
+        "AfterPoints": after_points,
+        "Timeout": timeout,
+    }, timeout=timeout + 5.0)
+    points = extract_points(response)
+    return points if points is not None else 0
 
 
 @pytest.fixture
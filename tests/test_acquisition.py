@@ -9,38 +9,41 @@ Tests complete acquisition workflows for:
 - Chunked data retrieval
 """
 
+import os
+import sys
+import numpy as np
 import pytest
 import time
 
+# Ensure conftest can be imported
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from conftest import (
+    DEFINE_FAT_5_SAMPLES, DEFINE_FAT_21_SAMPLES, extract_data, extract_points,
+    extract_state, wait_for_points,
+)
+
 
 class TestAcquisitionWorkflow1D:
     """Tests for 1D spectrum acquisition workflow."""
 
     def test_complete_1d_workflow(self, client, spectrum_params_1d, wait_for_complete_func):
         """Test complete 1D acquisition workflow."""
-        # Connect
-        response = client.send_command("Connect")
-        assert "OK" in response
-
-        # Define spectrum
-        response = client.send_command("DefineSpectrumFAT", {
-            "StartEnergy": spectrum_params_1d["StartEnergy"],
-            "EndEnergy": spectrum_params_1d["EndEnergy"],
-            "StepWidth": spectrum_params_1d["StepWidth"],
-            "DwellTime": 0.01,  # Fast for testing
-            "PassEnergy": spectrum_params_1d["PassEnergy"],
-            "ValuesPerSample": 1,
-        })
-        assert "OK" in response
-
-        # Validate
-        response = client.send_command("ValidateSpectrum")
-        assert "OK" in response
-        assert "Samples:21" in response
-
-        # Start
-        response = client.send_command("Start")
-        assert "OK" in response
+        # Connect, define, validate and start in one round trip
+        responses = client.send_batch([
+            ("Connect", None),
+            ("DefineSpectrumFAT", {
+                "StartEnergy": spectrum_params_1d["StartEnergy"],
+                "EndEnergy": spectrum_params_1d["EndEnergy"],
+                "StepWidth": spectrum_params_1d["StepWidth"],
+                "DwellTime": 0.01,  # Fast for testing
+                "PassEnergy": spectrum_params_1d["PassEnergy"],
+                "ValuesPerSample": 1,
+            }),
+            ("ValidateSpectrum", None),
+            ("Start", None),
+        ])
+        assert all("OK" in response for response in responses)
+        assert "Samples:21" in responses[2]
 
         # Wait for completion
         response = wait_for_complete_func(client, timeout=15.0)
@@ -54,8 +57,7 @@ class TestAcquisitionWorkflow1D:
         assert "Data:[" in response
 
         # Parse and verify
-        data_str = response.split("Data:[")[1].split("]")[0]
-        data = [float(x) for x in data_str.split(",")]
+        data = extract_data(response)
         assert len(data) == 21
 
         # Disconnect
@@ -84,34 +86,114 @@ class TestAcquisitionWorkflow1D:
                 "FromIndex": start,
                 "ToIndex": end,
             })
-            data_str = response.split("Data:[")[1].split("]")[0]
-            chunk = [float(x) for x in data_str.split(",")]
+            chunk = extract_data(response)
             all_data.extend(chunk)
 
         assert len(all_data) == 21
 
+        # A single request returns the same values as the chunks together
+        response = client.send_command("GetAcquisitionData", {
+            "FromIndex": 0,
+            "ToIndex": 20,
+        })
+        assert np.array_equal(extract_data(response), all_data)
 
-class TestAcquisitionWorkflow2D:
-    """Tests for 2D image acquisition workflow."""
+    def test_1d_binary_retrieval_matches_ascii(self, client, wait_for_complete_func):
+        """Test GetAcquisitionDataBinary returns the ASCII values as float32."""
+        client.send_command("Connect")
+        client.send_command("DefineSpectrumFAT", {
+            "StartEnergy": 400.0,
+            "EndEnergy": 410.0,
+            "StepWidth": 0.5,
+            "DwellTime": 0.01,
+            "PassEnergy": 20.0,
+        })
+        client.send_command("ValidateSpectrum")
+        client.send_command("Start")
+        wait_for_complete_func(client, timeout=15.0)
 
-    def test_complete_2d_workflow(self, client, wait_for_complete_func):
-        """Test complete 2D acquisition workflow."""
-        n_samples = 11  # 400-405 eV, step 0.5
-        n_pixels = 32   # Detector pixels
+        response = client.send_command("GetAcquisitionData", {
+            "FromIndex": 0,
+            "ToIndex": 20,
+        })
+        ascii_data = extract_data(response)
 
+        # Binary reply: header line, then exactly Bytes bytes of float32le
+        header, payload = client.send_command_binary("GetAcquisitionDataBinary", {
+            "FromIndex": 0,
+            "ToIndex": 20,
+        })
+        assert header.startswith(f"!{client.request_counter:04X} OK:")
+        assert "Format:float32le" in header
+        assert "Bytes:84" in header
+        assert len(payload) == 21 * 4
+
+        # The client is back in step: the next reply parses normally
+        assert "OK" in client.send_command("GetAcquisitionStatus")
+
+        binary_data = np.frombuffer(payload, dtype="<f4")
+        np.testing.assert_allclose(binary_data, ascii_data, rtol=1e-6, atol=1e-6)
+
+    def test_1d_wait_for_status_follows_progress(self, client, parse_response_func):
+        """Test WaitForAcquisitionStatus replies only after new points land."""
         client.send_command("Connect")
-        response = client.send_command("DefineSpectrumFAT", {
+        client.send_command("DefineSpectrumFAT", {
             "StartEnergy": 400.0,
-            "EndEnergy": 405.0,
+            "EndEnergy": 410.0,
             "StepWidth": 0.5,
             "DwellTime": 0.01,
             "PassEnergy": 20.0,
-            "ValuesPerSample": n_pixels,
         })
-        assert "OK" in response
-
         client.send_command("ValidateSpectrum")
         client.send_command("Start")
+
+        points = 0
+        for _ in range(100):
+            response = client.send_command("WaitForAcquisitionStatus", {
+                "AfterPoints": points,
+                "Timeout": 5.0,
+            })
+            params = parse_response_func(response)["params"]
+            if params["ControllerState"] == "finished":
+                break
+            assert int(params["NumberOfAcquiredPoints"]) > points
+            points = int(params["NumberOfAcquiredPoints"])
+
+        assert params["ControllerState"] == "finished"
+        assert int(params["NumberOfAcquiredPoints"]) == 21
+
+        # Not running: replies at once even though no points are added
+        start = time.monotonic()
+        response = client.send_command("WaitForAcquisitionStatus", {
+            "AfterPoints": 21,
+            "Timeout": 5.0,
+        })
+        assert "finished" in response
+        assert time.monotonic() - start < 1.0
+
+
+class TestAcquisitionWorkflow2D:
+    """Tests for 2D image acquisition workflow."""
+
+    def test_complete_2d_workflow(self, client, wait_for_complete_func):
+        """Test complete 2D acquisition workflow."""
+        n_samples = 11  # 400-405 eV, step 0.5
+        n_pixels = 32   # Detector pixels
+
+        responses = client.send_batch([
+            ("Connect", None),
+            ("DefineSpectrumFAT", {
+                "StartEnergy": 400.0,
+                "EndEnergy": 405.0,
+                "StepWidth": 0.5,
+                "DwellTime": 0.01,
+                "PassEnergy": 20.0,
+                "ValuesPerSample": n_pixels,
+            }),
+            ("ValidateSpectrum", None),
+            ("Start", None),
+        ])
+        assert all("OK" in response for response in responses)
         wait_for_complete_func(client, timeout=30.0)
 
         # Total data points = n_samples * n_pixels = 11 * 32 = 352
@@ -122,8 +204,7 @@ class TestAcquisitionWorkflow2D:
         })
         assert "Data:[" in response
 
-        data_str = response.split("Data:[")[1].split("]")[0]
-        data = [float(x) for x in data_str.split(",")]
+        data = extract_data(response)
         assert len(data) == expected_total
 
     def test_2d_data_layout(self, client, wait_for_complete_func):
@@ -150,17 +231,16 @@ class TestAcquisitionWorkflow2D:
             "ToIndex": total - 1,
         })
 
-        data_str = response.split("Data:[")[1].split("]")[0]
-        data = [float(x) for x in data_str.split(",")]
+        data = extract_data(response)
 
-        # Reshape to 2D (sample, pixel)
-        data_2d = []
-        for sample in range(n_samples):
-            row = data[sample * n_pixels:(sample + 1) * n_pixels]
-            data_2d.append(row)
+        # Reshape to 2D (sample, pixel): a view, no copy
+        data_2d = data.reshape(n_samples, n_pixels)
 
-        assert len(data_2d) == n_samples
-        assert len(data_2d[0]) == n_pixels
+        assert data_2d.shape == (n_samples, n_pixels)
+        # Sample-major: each row holds one energy step's pixels, and the
+        # simulated peak moves to lower pixels as the energy increases
+        centroids = (data_2d * np.arange(n_pixels)).sum(axis=1) / data_2d.sum(axis=1)
+        assert np.all(np.diff(centroids) < 0)
 
     def test_2d_realtime_polling(self, client):
         """Test real-time polling of 2D acquisition progress."""
@@ -179,41 +259,44 @@ class TestAcquisitionWorkflow2D:
         client.send_command("ValidateSpectrum")
         client.send_command("Start")
 
-        # Poll and collect data incrementally
+        # Collect data incrementally, one round trip per block of at least
+        # four energy steps: each batch fetches the values the previous
+        # status reported and long-polls for the next block of points
         last_index = -1
         all_data = []
         max_polls = 100
+        block_samples = 4
+        acquired_samples = 0
+        finished = False
 
         for _ in range(max_polls):
-            response = client.send_command("GetAcquisitionStatus")
-
-            if "finished" in response.lower():
+            current_values = acquired_samples * n_pixels
+            commands = []
+            if current_values > last_index + 1:
+                commands.append(("GetAcquisitionData", {
+                    "FromIndex": last_index + 1,
+                    "ToIndex": current_values - 1,
+                }))
+            elif finished:
                 break
-
+            commands.append(("WaitForAcquisitionStatus", {
+                "AfterPoints": acquired_samples + block_samples - 1,
+                "Timeout": 5.0,
+            }))
+            *fetch_responses, response = client.send_batch(commands)
+
+            for fetch_response in fetch_responses:
+                if "Data:[" in fetch_response:
+                    all_data.extend(extract_data(fetch_response))
+                    last_index = current_values - 1
+
+            finished = extract_state(response) == "finished"
             if "NumberOfAcquiredPoints:" in response:
-                parts = response.split("NumberOfAcquiredPoints:")
-                acquired_samples = int(parts[1].split()[0])
-                current_values = acquired_samples * n_pixels
-
-                if current_values > last_index + 1 and current_values > 0:
-                    # Fetch new data
-                    fetch_response = client.send_command("GetAcquisitionData", {
-                        "FromIndex": last_index + 1,
-                        "ToIndex": current_values - 1,
-                    })
-                    if "Data:[" in fetch_response:
-                        data_str = fetch_response.split("Data:[")[1].split("]")[0]
-                        new_data = [float(x) for x in data_str.split(",") if x.strip()]
-                        all_data.extend(new_data)
-                        last_index = current_values - 1
-
-            time.sleep(0.1)
-
-        # Should have collected data
+                acquired_samples = extract_points(response)
+
+        # Every value was collected exactly once
         expected_total = n_samples * n_pixels
-        assert len(all_data) > 0
-        # May not have all data if we finished polling early
-        assert len(all_data) <= expected_total
+        assert len(all_data) == expected_total
 
         client.send_command("Abort")
 
@@ -227,20 +310,21 @@ class TestAcquisitionWorkflow3D:
         n_samples = 5  # 400-402 eV, step 0.5
         n_pixels = 8
 
-        client.send_command("Connect")
-        response = client.send_command("DefineSpectrumFAT", {
-            "StartEnergy": 400.0,
-            "EndEnergy": 402.0,
-            "StepWidth": 0.5,
-            "DwellTime": 0.01,
-            "PassEnergy": 20.0,
-            "ValuesPerSample": n_pixels,
-            "NumberOfSlices": n_slices,
-        })
-        assert "OK" in response
-
-        client.send_command("ValidateSpectrum")
-        client.send_command("Start")
+        responses = client.send_batch([
+            ("Connect", None),
+            ("DefineSpectrumFAT", {
+                "StartEnergy": 400.0,
+                "EndEnergy": 402.0,
+                "StepWidth": 0.5,
+                "DwellTime": 0.01,
+                "PassEnergy": 20.0,
+                "ValuesPerSample": n_pixels,
+                "NumberOfSlices": n_slices,
+            }),
+            ("ValidateSpectrum", None),
+            ("Start", None),
+        ])
+        assert all("OK" in response for response in responses)
         wait_for_complete_func(client, timeout=30.0)
 
         # Total = slices * samples * pixels = 3 * 5 * 8 = 120
@@ -251,8 +335,7 @@ class TestAcquisitionWorkflow3D:
         })
         assert "Data:[" in response
 
-        data_str = response.split("Data:[")[1].split("]")[0]
-        data = [float(x) for x in data_str.split(",")]
+        data = extract_data(response)
         assert len(data) == expected_total
 
     def test_3d_data_layout(self, client, wait_for_complete_func):
@@ -281,22 +364,16 @@ class TestAcquisitionWorkflow3D:
             "ToIndex": total - 1,
         })
 
-        data_str = response.split("Data:[")[1].split("]")[0]
-        data = [float(x) for x in data_str.split(",")]
+        data = extract_data(response)
 
-        # Reshape to 3D (slice, sample, pixel)
-        data_3d = []
-        for slice_idx in range(n_slices):
-            slice_data = []
-            for sample_idx in range(n_samples):
-                start = (slice_idx * n_samples + sample_idx) * n_pixels
-                row = data[start:start + n_pixels]
-                slice_data.append(row)
-            data_3d.append(slice_data)
+        # Reshape to 3D (slice, sample, pixel): a view, no copy
+        data_3d = data.reshape(n_slices, n_samples, n_pixels)
 
-        assert len(data_3d) == n_slices
-        assert len(data_3d[0]) == n_samples
-        assert len(data_3d[0][0]) == n_pixels
+        assert data_3d.shape == (n_slices, n_samples, n_pixels)
+        # Slice-major, then sample, then pixel: within every slice the
+        # simulated peak moves to lower pixels as the energy increases
+        centroids = (data_3d * np.arange(n_pixels)).sum(axis=2) / data_3d.sum(axis=2)
+        assert np.all(np.diff(centroids, axis=1) < 0)
 
     def test_3d_index_calculation(self, client, wait_for_complete_func):
         """Test that 3D index calculation is correct."""
@@ -324,8 +401,7 @@ class TestAcquisitionWorkflow3D:
             "ToIndex": total - 1,
         })
 
-        data_str = response.split("Data:[")[1].split("]")[0]
-        data = [float(x) for x in data_str.split(",")]
+        data = extract_data(response)
 
         # Verify index formula: index = slice * (S * V) + sample * V + pixel
         # For slice=1, sample=1, pixel=2:
@@ -340,6 +416,11 @@ class TestAcquisitionWorkflow3D:
         assert get_index(1, 0, 0) == 12
         assert get_index(1, 1, 2) == 18
 
+        # The simulated peak of slice 1, sample 1 (400.5 eV) is centred
+        # on pixel 2, so the formula must find the brightest value there
+        row = data[[get_index(1, 1, pixel_idx) for pixel_idx in range(n_pixels)]]
+        assert np.argmax(row) == 2
+
 
 class TestAcquisitionPauseResume:
     """Tests for pause/resume during acquisition."""
@@ -357,24 +438,20 @@ class TestAcquisitionPauseResume:
         client.send_command("ValidateSpectrum")
         client.send_command("Start")
 
-        # Wait a bit, then pause
-        time.sleep(0.3)
+        # Let a couple of points land, then pause
+        wait_for_points(client, after_points=1)
         client.send_command("Pause")
 
         # Get progress
         response1 = client.send_command("GetAcquisitionStatus")
         if "NumberOfAcquiredPoints:" in response1:
-            progress1 = int(response1.split("NumberOfAcquiredPoints:")[1].split()[0])
+            progress1 = extract_points(response1)
         else:
             progress1 = 0
 
-        # Wait and check progress hasn't changed
-        time.sleep(0.5)
-        response2 = client.send_command("GetAcquisitionStatus")
-        if "NumberOfAcquiredPoints:" in response2:
-            progress2 = int(response2.split("NumberOfAcquiredPoints:")[1].split()[0])
-        else:
-            progress2 = 0
+        # A paused acquisition adds no points, so the wait runs to its
+        # timeout and reports the same count
+        progress2 = wait_for_points(client, after_points=progress1, timeout=0.2)
 
         # Progress should not have increased during pause
         assert progress2 == progress1
@@ -384,18 +461,12 @@ class TestAcquisitionPauseResume:
     def test_resume_continues_acquisition(self, client):
         """Test that resume continues acquisition after pause."""
         client.send_command("Connect")
-        client.send_command("DefineSpectrumFAT", {
-            "StartEnergy": 400.0,
-            "EndEnergy": 410.0,
-            "StepWidth": 0.5,
-            "DwellTime": 0.1,
-            "PassEnergy": 20.0,
-        })
+        client.send_template(DEFINE_FAT_21_SAMPLES)
         client.send_command("ValidateSpectrum")
         client.send_command("Start")
 
-        # Pause
-        time.sleep(0.2)
+        # Pause once some points have landed
+        wait_for_points(client, after_points=0)
         client.send_command("Pause")
         response_paused = client.send_command("GetAcquisitionStatus")
         assert "paused" in response_paused.lower()
@@ -403,17 +474,11 @@ class TestAcquisitionPauseResume:
         # Get paused progress
         paused_progress = 0
         if "NumberOfAcquiredPoints:" in response_paused:
-            paused_progress = int(response_paused.split("NumberOfAcquiredPoints:")[1].split()[0])
+            paused_progress = extract_points(response_paused)
 
-        # Resume
+        # Resume and wait for the next point
         client.send_command("Resume")
-        time.sleep(0.3)
-
-        # Check progress increased
-        response_resumed = client.send_command("GetAcquisitionStatus")
-        resumed_progress = 0
-        if "NumberOfAcquiredPoints:" in response_resumed:
-            resumed_progress = int(response_resumed.split("NumberOfAcquiredPoints:")[1].split()[0])
+        resumed_progress = wait_for_points(client, after_points=paused_progress)
 
         assert resumed_progress > paused_progress
 
@@ -436,7 +501,7 @@ class TestAcquisitionAbort:
         client.send_command("ValidateSpectrum")
         client.send_command("Start")
 
-        time.sleep(0.2)
+        wait_for_points(client, after_points=0)
         response = client.send_command("Abort")
         assert "OK" in response
 
@@ -456,7 +521,7 @@ class TestAcquisitionAbort:
         client.send_command("ValidateSpectrum")
         client.send_command("Start")
 
-        time.sleep(0.5)  # Allow some data collection
+        wait_for_points(client, after_points=4)  # Allow some data collection
         client.send_command("Abort")
 
         # Should be able to retrieve partial data
@@ -501,13 +566,7 @@ class TestMultipleAcquisitions:
         """Test disconnecting and reconnecting between acquisitions."""
         # First acquisition
         client.send_command("Connect")
-        client.send_command("DefineSpectrumFAT", {
-            "StartEnergy": 400.0,
-            "EndEnergy": 402.0,
-            "StepWidth": 0.5,
-            "DwellTime": 0.01,
-            "PassEnergy": 20.0,
-        })
+        client.send_template(DEFINE_FAT_5_SAMPLES)
         client.send_command("ValidateSpectrum")
         client.send_command("Start")
         wait_for_complete_func(client, timeout=15.0)
@@ -519,13 +578,7 @@ class TestMultipleAcquisitions:
         client.connect()     # Reopen socket
 
         client.send_command("Connect")
-        client.send_command("DefineSpectrumFAT", {
-            "StartEnergy": 400.0,
-            "EndEnergy": 402.0,
-            "StepWidth": 0.5,
-            "DwellTime": 0.01,
-            "PassEnergy": 20.0,
-        })
+        client.send_template(DEFINE_FAT_5_SAMPLES)
         client.send_command("ValidateSpectrum")
         response = client.send_command("Start")
         assert "OK" in response
@@ -9,9 +9,16 @@ Tests verify:
 - Energy axis calculation
 """
 
+import os
+import sys
+import numpy as np
 import pytest
 import math
 
+# Ensure conftest can be imported
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from conftest import extract_data
+
 
 class TestDataReshaping:
     """Tests for reshaping flat data arrays to N-D."""
@@ -19,7 +26,7 @@ class TestDataReshaping:
     def test_reshape_1d(self):
         """Test reshaping flat array to 1D (no reshape needed)."""
         n_samples = 21
-        flat_data = [i * 1.0 for i in range(n_samples)]
+        flat_data = np.arange(n_samples, dtype=np.float64)
 
         # 1D is just the flat array
         data_1d = flat_data
@@ -34,18 +41,11 @@ class TestDataReshaping:
         n_pixels = 4
         total = n_samples * n_pixels
 
-        # Create flat array with index as value for verification
-        flat_data = [i * 1.0 for i in range(total)]
-
-        # Reshape to 2D (sample-major order)
-        data_2d = []
-        for sample in range(n_samples):
-            start = sample * n_pixels
-            row = flat_data[start:start + n_pixels]
-            data_2d.append(row)
+        # Flat array with index as value for verification, reshaped to 2D
+        # (sample-major order) as a view
+        data_2d = np.arange(total, dtype=np.float64).reshape(n_samples, n_pixels)
 
-        assert len(data_2d) == n_samples
-        assert len(data_2d[0]) == n_pixels
+        assert data_2d.shape == (n_samples, n_pixels)
 
         # Verify values
         assert data_2d[0][0] == 0.0   # sample 0, pixel 0
@@ -60,22 +60,13 @@ class TestDataReshaping:
         n_pixels = 4
         total = n_slices * n_samples * n_pixels
 
-        # Create flat array with index as value
-        flat_data = [i * 1.0 for i in range(total)]
-
-        # Reshape to 3D (slice-sample-pixel order)
-        data_3d = []
-        for slice_idx in range(n_slices):
-            slice_data = []
-            for sample_idx in range(n_samples):
-                start = (slice_idx * n_samples + sample_idx) * n_pixels
-                row = flat_data[start:start + n_pixels]
-                slice_data.append(row)
-            data_3d.append(slice_data)
+        # Flat array with index as value, reshaped to 3D
+        # (slice-sample-pixel order) as a view
+        data_3d = np.arange(total, dtype=np.float64).reshape(
+            n_slices, n_samples, n_pixels
+        )
 
-        assert len(data_3d) == n_slices
-        assert len(data_3d[0]) == n_samples
-        assert len(data_3d[0][0]) == n_pixels
+        assert data_3d.shape == (n_slices, n_samples, n_pixels)
 
         # Verify values using index formula
         # index = slice * (S * V) + sample * V + pixel
@@ -97,12 +88,11 @@ class TestIndexCalculation:
         def calc_index(sample, pixel):
             return sample * n_pixels + pixel
 
-        # Verify formula
-        assert calc_index(0, 0) == 0
-        assert calc_index(0, 3) == 3
-        assert calc_index(1, 0) == 4
-        assert calc_index(2, 2) == 10
-        assert calc_index(4, 3) == 19
+        # Verify formula over every (sample, pixel): each cell must hold
+        # its own position in the flat, sample-major array
+        sample, pixel = np.indices((n_samples, n_pixels))
+        expected = np.arange(n_samples * n_pixels).reshape(n_samples, n_pixels)
+        assert np.array_equal(calc_index(sample, pixel), expected)
 
     def test_3d_index_formula(self):
         """Test 3D index formula: index = slice * (S * V) + sample * V + pixel"""
@@ -113,16 +103,15 @@ class TestIndexCalculation:
         def calc_index(slice_idx, sample, pixel):
             return slice_idx * (n_samples * n_pixels) + sample * n_pixels + pixel
 
-        # Verify formula
-        assert calc_index(0, 0, 0) == 0
-        assert calc_index(0, 0, 3) == 3
-        assert calc_index(0, 1, 0) == 4
-        assert calc_index(0, 2, 3) == 11
-        assert calc_index(1, 0, 0) == 12
-        assert calc_index(1, 2, 3) == 23
+        # Verify formula over every (slice, sample, pixel)
+        shape = (n_slices, n_samples, n_pixels)
+        slice_idx, sample, pixel = np.indices(shape)
+        expected = np.arange(n_slices * n_samples * n_pixels).reshape(shape)
+        assert np.array_equal(calc_index(slice_idx, sample, pixel), expected)
 
     def test_reverse_index_2d(self):
         """Test converting flat index back to 2D coordinates."""
+        n_samples = 5
         n_pixels = 4
 
         def index_to_2d(flat_idx):
@@ -130,13 +119,15 @@ class TestIndexCalculation:
             pixel = flat_idx % n_pixels
             return sample, pixel
 
-        assert index_to_2d(0) == (0, 0)
-        assert index_to_2d(3) == (0, 3)
-        assert index_to_2d(4) == (1, 0)
-        assert index_to_2d(19) == (4, 3)
+        # Every flat index maps back to the coordinates it came from
+        sample, pixel = index_to_2d(np.arange(n_samples * n_pixels))
+        expected_sample, expected_pixel = np.indices((n_samples, n_pixels))
+        assert np.array_equal(sample, expected_sample.ravel())
+        assert np.array_equal(pixel, expected_pixel.ravel())
 
     def test_reverse_index_3d(self):
         """Test converting flat index back to 3D coordinates."""
+        n_slices = 2
         n_samples = 3
         n_pixels = 4
         slice_size = n_samples * n_pixels
@@ -148,10 +139,11 @@ class TestIndexCalculation:
             pixel = remainder % n_pixels
             return slice_idx, sample, pixel
 
-        assert index_to_3d(0) == (0, 0, 0)
-        assert index_to_3d(11) == (0, 2, 3)
-        assert index_to_3d(12) == (1, 0, 0)
-        assert index_to_3d(23) == (1, 2, 3)
+        # Every flat index maps back to the coordinates it came from
+        shape = (n_slices, n_samples, n_pixels)
+        coords = index_to_3d(np.arange(n_slices * slice_size))
+        for actual, expected in zip(coords, np.indices(shape)):
+            assert np.array_equal(actual, expected.ravel())
 
 
 class TestEnergyAxisCalculation:
@@ -163,8 +155,9 @@ class TestEnergyAxisCalculation:
         end_energy = 410.0
         step_size = 0.5
 
-        n_samples = int((end_energy - start_energy) / step_size) + 1
-        energy_axis = [start_energy + i * step_size for i in range(n_samples)]
+        # Same truncating sample count as the simulator
+        n_samples = int((end_energy - start_energy) / step_size + 1)
+        energy_axis = np.linspace(start_energy, end_energy, n_samples)
 
         assert len(energy_axis) == 21
         assert energy_axis[0] == 400.0
@@ -177,22 +170,23 @@ class TestEnergyAxisCalculation:
         end_energy = 101.0
         step_size = 0.1
 
-        n_samples = int((end_energy - start_energy) / step_size) + 1
-        energy_axis = [start_energy + i * step_size for i in range(n_samples)]
+        # Same truncating sample count as the simulator
+        n_samples = int((end_energy - start_energy) / step_size + 1)
+        energy_axis = np.linspace(start_energy, end_energy, n_samples)
 
         assert len(energy_axis) == 11
-        assert abs(energy_axis[0] - 100.0) < 1e-9
+        # linspace hits both endpoints exactly; only inner points round
+        assert energy_axis[0] == 100.0
         assert abs(energy_axis[5] - 100.5) < 1e-9
-        assert abs(energy_axis[10] - 101.0) < 1e-9
+        assert energy_axis[10] == 101.0
 
     def test_energy_axis_single_point(self):
         """Test energy axis with single point (start == end)."""
         start_energy = 405.0
         end_energy = 405.0
-        step_size = 0.5
 
         n_samples = 1
-        energy_axis = [start_energy + i * step_size for i in range(n_samples)]
+        energy_axis = np.linspace(start_energy, end_energy, n_samples)
 
         assert len(energy_axis) == 1
         assert energy_axis[0] == 405.0
@@ -224,11 +218,11 @@ class TestDataAccumulation:
             "FromIndex": 0,
             "ToIndex": n_samples - 1,
         })
-        data_str = response_full.split("Data:[")[1].split("]")[0]
-        full_data = [float(x) for x in data_str.split(",")]
+        full_data = extract_data(response_full)
 
-        # Retrieve same data in chunks
-        chunked_data = []
+        # Retrieve same data in chunks, copied into a preallocated array
+        chunked_data = np.empty(n_samples, dtype=np.float64)
+        pos = 0
         chunk_size = 3
         for start in range(0, n_samples, chunk_size):
             end = min(start + chunk_size - 1, n_samples - 1)
@@ -236,14 +230,14 @@ class TestDataAccumulation:
                 "FromIndex": start,
                 "ToIndex": end,
             })
-            data_str = response.split("Data:[")[1].split("]")[0]
-            chunk = [float(x) for x in data_str.split(",")]
-            chunked_data.extend(chunk)
+            chunk = extract_data(response)
+            chunked_data[pos:pos + len(chunk)] = chunk
+            pos += len(chunk)
 
         # Compare
-        assert len(chunked_data) == len(full_data)
-        for i in range(len(full_data)):
-            assert abs(chunked_data[i] - full_data[i]) < 1e-6
+        assert pos == n_samples
+        assert len(full_data) == n_samples
+        np.testing.assert_allclose(chunked_data, full_data, rtol=0, atol=1e-6)
 
     def test_overlapping_chunks_consistent(self, client, simulator, wait_for_complete_func):
         """Test that overlapping chunk requests return consistent data."""
@@ -266,19 +260,18 @@ class TestDataAccumulation:
             "FromIndex": 3,
             "ToIndex": 7,
         })
-        data1 = [float(x) for x in response1.split("Data:[")[1].split("]")[0].split(",")]
+        data1 = extract_data(response1)
 
         response2 = client.send_command("GetAcquisitionData", {
             "FromIndex": 5,
             "ToIndex": 9,
         })
-        data2 = [float(x) for x in response2.split("Data:[")[1].split("]")[0].split(",")]
+        data2 = extract_data(response2)
 
         # Overlapping region: indices 5, 6, 7 should match
         # data1[2:5] corresponds to indices 5,6,7
         # data2[0:3] corresponds to indices 5,6,7
-        for i in range(3):
-            assert abs(data1[2 + i] - data2[i]) < 1e-6
+        np.testing.assert_allclose(data1[2:5], data2[0:3], rtol=0, atol=1e-6)
 
 
 class TestIntegratedSpectrum:
@@ -289,18 +282,13 @@ class TestIntegratedSpectrum:
         n_samples = 5
         n_pixels = 4
 
-        # Create test 2D data
-        data_2d = []
-        for sample in range(n_samples):
-            # Each pixel has value = sample * 10 + pixel
-            row = [sample * 10 + pixel for pixel in range(n_pixels)]
-            data_2d.append(row)
+        # Create test 2D data: each pixel has value = sample * 10 + pixel
+        sample = np.arange(n_samples)[:, None]
+        pixel = np.arange(n_pixels)[None, :]
+        data_2d = sample * 10 + pixel
 
         # Integrate (sum over pixels)
-        spectrum_1d = []
-        for sample in range(n_samples):
-            total = sum(data_2d[sample])
-            spectrum_1d.append(total)
+        spectrum_1d = data_2d.sum(axis=1)
 
         assert len(spectrum_1d) == n_samples
         # Sample 0: 0+1+2+3 = 6
@@ -316,23 +304,14 @@ class TestIntegratedSpectrum:
         n_samples = 3
         n_pixels = 4
 
-        # Create test 3D data
-        data_3d = []
-        for slice_idx in range(n_slices):
-            slice_data = []
-            for sample in range(n_samples):
-                # Value = slice * 100 + sample * 10 + pixel
-                row = [slice_idx * 100 + sample * 10 + pixel for pixel in range(n_pixels)]
-                slice_data.append(row)
-            data_3d.append(slice_data)
+        # Create test 3D data: value = slice * 100 + sample * 10 + pixel
+        slice_idx = np.arange(n_slices)[:, None, None]
+        sample = np.arange(n_samples)[None, :, None]
+        pixel = np.arange(n_pixels)[None, None, :]
+        data_3d = slice_idx * 100 + sample * 10 + pixel
 
         # Integrate (sum over slices and pixels)
-        spectrum_1d = []
-        for sample in range(n_samples):
-            total = 0
-            for slice_idx in range(n_slices):
-                total += sum(data_3d[slice_idx][sample])
-            spectrum_1d.append(total)
+        spectrum_1d = data_3d.sum(axis=(0, 2))
 
         assert len(spectrum_1d) == n_samples
         # Sample 0: (0+1+2+3) + (100+101+102+103) = 6 + 406 = 412
@@ -399,8 +378,7 @@ class TestLargeDatasets:
             "ToIndex": n_samples - 1,
         })
 
-        data_str = response.split("Data:[")[1].split("]")[0]
-        data = [float(x) for x in data_str.split(",")]
+        data = extract_data(response)
 
         assert len(data) == n_samples
 
@@ -429,7 +407,6 @@ class TestLargeDatasets:
             "ToIndex": total - 1,
         })
 
-        data_str = response.split("Data:[")[1].split("]")[0]
-        data = [float(x) for x in data_str.split(",")]
+        data = extract_data(response)
 
         assert len(data) == total
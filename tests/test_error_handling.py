@@ -10,10 +10,15 @@ Tests verify proper handling of:
 """
 
 import os
+import sys
 import pytest
 import socket
 import time
 
+# Ensure conftest can be imported
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from conftest import DEFINE_FAT_5_SAMPLES, DEFINE_FAT_21_SAMPLES
+
 # Check if using external simulator
 USE_EXTERNAL_SIMULATOR = os.environ.get("USE_EXTERNAL_SIMULATOR", "0") == "1"
 
@@ -216,13 +221,7 @@ class TestDataRetrievalErrors:
     def test_get_data_invalid_from_index(self, client, wait_for_complete_func):
         """Test GetAcquisitionData with invalid FromIndex."""
         client.send_command("Connect")
-        client.send_command("DefineSpectrumFAT", {
-            "StartEnergy": 400.0,
-            "EndEnergy": 402.0,
-            "StepWidth": 0.5,
-            "DwellTime": 0.01,
-            "PassEnergy": 20.0,
-        })
+        client.send_template(DEFINE_FAT_5_SAMPLES)
         client.send_command("ValidateSpectrum")
         client.send_command("Start")
         wait_for_complete_func(client, timeout=10.0)
@@ -237,13 +236,7 @@ class TestDataRetrievalErrors:
     def test_get_data_invalid_to_index(self, client, wait_for_complete_func):
         """Test GetAcquisitionData with ToIndex beyond data range."""
         client.send_command("Connect")
-        client.send_command("DefineSpectrumFAT", {
-            "StartEnergy": 400.0,
-            "EndEnergy": 402.0,  # 5 samples
-            "StepWidth": 0.5,
-            "DwellTime": 0.01,
-            "PassEnergy": 20.0,
-        })
+        client.send_template(DEFINE_FAT_5_SAMPLES)
         client.send_command("ValidateSpectrum")
         client.send_command("Start")
         wait_for_complete_func(client, timeout=10.0)
@@ -258,13 +251,7 @@ class TestDataRetrievalErrors:
     def test_get_data_reversed_range(self, client, wait_for_complete_func):
         """Test GetAcquisitionData with FromIndex > ToIndex."""
         client.send_command("Connect")
-        client.send_command("DefineSpectrumFAT", {
-            "StartEnergy": 400.0,
-            "EndEnergy": 402.0,
-            "StepWidth": 0.5,
-            "DwellTime": 0.01,
-            "PassEnergy": 20.0,
-        })
+        client.send_template(DEFINE_FAT_5_SAMPLES)
         client.send_command("ValidateSpectrum")
         client.send_command("Start")
         wait_for_complete_func(client, timeout=10.0)
@@ -326,26 +313,14 @@ class TestRecoveryScenarios:
         client.send_command("Connect")
 
         # First acquisition - abort
-        client.send_command("DefineSpectrumFAT", {
-            "StartEnergy": 400.0,
-            "EndEnergy": 410.0,
-            "StepWidth": 0.5,
-            "DwellTime": 0.1,
-            "PassEnergy": 20.0,
-        })
+        client.send_template(DEFINE_FAT_21_SAMPLES)
         client.send_command("ValidateSpectrum")
         client.send_command("Start")
         client.send_command("Abort")
 
         # Should be able to start new acquisition
         client.send_command("ClearSpectrum")
-        client.send_command("DefineSpectrumFAT", {
-            "StartEnergy": 400.0,
-            "EndEnergy": 402.0,
-            "StepWidth": 0.5,
-            "DwellTime": 0.01,
-            "PassEnergy": 20.0,
-        })
+        client.send_template(DEFINE_FAT_5_SAMPLES)
         client.send_command("ValidateSpectrum")
         response = client.send_command("Start")
         assert "OK" in response
@@ -357,13 +332,7 @@ class TestRecoveryScenarios:
         client.send_command("Connect")
 
         # Complete first acquisition
-        client.send_command("DefineSpectrumFAT", {
-            "StartEnergy": 400.0,
-            "EndEnergy": 402.0,
-            "StepWidth": 0.5,
-            "DwellTime": 0.01,
-            "PassEnergy": 20.0,
-        })
+        client.send_template(DEFINE_FAT_5_SAMPLES)
         client.send_command("ValidateSpectrum")
         client.send_command("Start")
         wait_for_complete_func(client, timeout=10.0)
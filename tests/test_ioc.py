@@ -480,6 +480,7 @@ class TestEPICSConnection:
 
 @pytest.mark.skipif(not EPICS_AVAILABLE, reason="pyepics not installed")
 @pytest.mark.skipif(not IOC_TESTS_ENABLED, reason="KREIOS IOC not running")
+@pytest.mark.serial
 class TestEPICSAcquisition:
     """Acquisition tests requiring EPICS IOC."""
 
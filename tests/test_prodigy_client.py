@@ -18,7 +18,10 @@ import socket
 
 # Ensure conftest can be imported
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
-from conftest import ProdigyTestClient, parse_response
+from conftest import (
+    DEFINE_FAT_5_SAMPLES, DEFINE_FAT_21_SAMPLES, ProdigyTestClient, extract_data,
+    parse_response,
+)
 
 
 class TestClientConnection:
@@ -99,6 +102,29 @@ class TestClientCommands:
         assert response is not None
         assert "OK" in response
 
+    def test_send_template(self, client):
+        """Test sending a preformatted request template."""
+        client.send_command("Connect")
+        response = client.send_template(DEFINE_FAT_21_SAMPLES)
+        assert response is not None
+        assert "OK" in response
+        # The template gets the next ID from the client's counter
+        assert response.startswith(f"!{client.request_counter:04X} ")
+
+    def test_send_command_binary_error_has_no_payload(self, client):
+        """Test that an error reply to a binary command carries no payload."""
+        client.send_command("Connect")
+        response, payload = client.send_command_binary("GetAcquisitionDataBinary", {
+            "FromIndex": 0,
+            "ToIndex": 4,
+        })
+        assert "Error:" in response
+        assert payload == b""
+
+        # Nothing was left unread: the next reply is the next command's
+        response = client.send_command("GetAnalyzerVisibleName")
+        assert response.startswith(f"!{client.request_counter:04X} OK")
+
     def test_send_command_increments_counter(self, client):
         """Test that request counter increments."""
         initial_counter = client.request_counter
@@ -143,8 +169,7 @@ class TestDataParsing:
 
         # Extract data array
         if "Data:[" in response:
-            data_str = response.split("Data:[")[1].split("]")[0]
-            data = [float(x) for x in data_str.split(",")]
+            data = extract_data(response)
         else:
             data = []
 
@@ -158,12 +183,11 @@ class TestDataParsing:
         response = "!0001 OK: Data:[]"
 
         if "Data:[" in response:
-            data_str = response.split("Data:[")[1].split("]")[0]
-            data = [float(x) for x in data_str.split(",") if x]
+            data = extract_data(response)
         else:
             data = []
 
-        assert data == []
+        assert len(data) == 0
 
     def test_parse_large_data_array(self):
         """Test parsing large data array."""
@@ -171,8 +195,7 @@ class TestDataParsing:
         values = [f"{i * 1.5:.6f}" for i in range(1000)]
         response = f"!0001 OK: Data:[{','.join(values)}]"
 
-        data_str = response.split("Data:[")[1].split("]")[0]
-        data = [float(x) for x in data_str.split(",")]
+        data = extract_data(response)
 
         assert len(data) == 1000
         assert data[0] == 0.0
@@ -189,13 +212,7 @@ class TestAcquisitionWorkflows:
         assert "OK" in response
 
         # Define spectrum
-        response = client.send_command("DefineSpectrumFAT", {
-            "StartEnergy": 400.0,
-            "EndEnergy": 402.0,
-            "StepWidth": 0.5,
-            "DwellTime": 0.01,
-            "PassEnergy": 20.0,
-        })
+        response = client.send_template(DEFINE_FAT_5_SAMPLES)
         assert "OK" in response
 
         # Validate
@@ -216,8 +233,7 @@ class TestAcquisitionWorkflows:
         })
         assert "Data:[" in response
 
-        data_str = response.split("Data:[")[1].split("]")[0]
-        data = [float(x) for x in data_str.split(",")]
+        data = extract_data(response)
         assert len(data) == 5
 
     def test_2d_acquisition(self, client, wait_for_complete_func):
@@ -250,8 +266,7 @@ class TestAcquisitionWorkflows:
         })
         assert "Data:[" in response
 
-        data_str = response.split("Data:[")[1].split("]")[0]
-        data = [float(x) for x in data_str.split(",")]
+        data = extract_data(response)
         assert len(data) == 50
 
     def test_3d_acquisition(self, client, wait_for_complete_func):
@@ -285,8 +300,7 @@ class TestAcquisitionWorkflows:
         })
         assert "Data:[" in response
 
-        data_str = response.split("Data:[")[1].split("]")[0]
-        data = [float(x) for x in data_str.split(",")]
+        data = extract_data(response)
         assert len(data) == 150
 
     def test_pause_resume_workflow(self, client):
@@ -9,8 +9,14 @@ Tests verify correct implementation of:
 - Protocol state machine
 """
 
+import os
+import sys
 import pytest
 
+# Ensure conftest can be imported
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from conftest import DEFINE_FAT_5_SAMPLES, DEFINE_FAT_21_SAMPLES
+
 
 class TestMessageFormat:
     """Tests for protocol message format compliance."""
@@ -96,13 +102,7 @@ class TestSpectrumDefinitionCommands:
     def test_define_spectrum_fat_success(self, client):
         """Test DefineSpectrumFAT with valid parameters."""
         client.send_command("Connect")
-        response = client.send_command("DefineSpectrumFAT", {
-            "StartEnergy": 400.0,
-            "EndEnergy": 410.0,
-            "StepWidth": 0.5,
-            "DwellTime": 0.1,
-            "PassEnergy": 20.0,
-        })
+        response = client.send_template(DEFINE_FAT_21_SAMPLES)
         assert "OK" in response
 
     def test_define_spectrum_sfat_success(self, client):
@@ -171,13 +171,7 @@ class TestSpectrumValidation:
     def test_validate_spectrum_success(self, client):
         """Test ValidateSpectrum returns spectrum parameters."""
         client.send_command("Connect")
-        client.send_command("DefineSpectrumFAT", {
-            "StartEnergy": 400.0,
-            "EndEnergy": 410.0,
-            "StepWidth": 0.5,
-            "DwellTime": 0.1,
-            "PassEnergy": 20.0,
-        })
+        client.send_template(DEFINE_FAT_21_SAMPLES)
         response = client.send_command("ValidateSpectrum")
         assert "OK" in response
         assert "Samples:" in response
@@ -210,13 +204,7 @@ class TestSpectrumValidation:
     def test_clear_spectrum(self, client):
         """Test ClearSpectrum resets spectrum state."""
         client.send_command("Connect")
-        client.send_command("DefineSpectrumFAT", {
-            "StartEnergy": 400.0,
-            "EndEnergy": 410.0,
-            "StepWidth": 0.5,
-            "DwellTime": 0.1,
-            "PassEnergy": 20.0,
-        })
+        client.send_template(DEFINE_FAT_21_SAMPLES)
         client.send_command("ValidateSpectrum")
 
         response = client.send_command("ClearSpectrum")
@@ -286,13 +274,7 @@ class TestAcquisitionCommands:
     def test_start_acquisition(self, client):
         """Test Start command begins acquisition."""
         client.send_command("Connect")
-        client.send_command("DefineSpectrumFAT", {
-            "StartEnergy": 400.0,
-            "EndEnergy": 402.0,
-            "StepWidth": 0.5,
-            "DwellTime": 0.01,
-            "PassEnergy": 20.0,
-        })
+        client.send_template(DEFINE_FAT_5_SAMPLES)
         client.send_command("ValidateSpectrum")
 
         response = client.send_command("Start")
@@ -307,13 +289,7 @@ class TestAcquisitionCommands:
     def test_pause_resume(self, client):
         """Test Pause and Resume commands."""
         client.send_command("Connect")
-        client.send_command("DefineSpectrumFAT", {
-            "StartEnergy": 400.0,
-            "EndEnergy": 410.0,
-            "StepWidth": 0.5,
-            "DwellTime": 0.1,
-            "PassEnergy": 20.0,
-        })
+        client.send_template(DEFINE_FAT_21_SAMPLES)
         client.send_command("ValidateSpectrum")
         client.send_command("Start")
 
@@ -332,13 +308,7 @@ class TestAcquisitionCommands:
     def test_abort_acquisition(self, client):
         """Test Abort command stops acquisition."""
         client.send_command("Connect")
-        client.send_command("DefineSpectrumFAT", {
-            "StartEnergy": 400.0,
-            "EndEnergy": 410.0,
-            "StepWidth": 0.5,
-            "DwellTime": 0.1,
-            "PassEnergy": 20.0,
-        })
+        client.send_template(DEFINE_FAT_21_SAMPLES)
         client.send_command("ValidateSpectrum")
         client.send_command("Start")
 
@@ -351,13 +321,7 @@ class TestAcquisitionCommands:
     def test_get_acquisition_status(self, client):
         """Test GetAcquisitionStatus returns state and progress."""
         client.send_command("Connect")
-        client.send_command("DefineSpectrumFAT", {
-            "StartEnergy": 400.0,
-            "EndEnergy": 402.0,
-            "StepWidth": 0.5,
-            "DwellTime": 0.01,
-            "PassEnergy": 20.0,
-        })
+        client.send_template(DEFINE_FAT_5_SAMPLES)
         client.send_command("ValidateSpectrum")
         client.send_command("Start")
 
@@ -368,13 +332,7 @@ class TestAcquisitionCommands:
     def test_get_acquisition_data(self, client, wait_for_complete_func):
         """Test GetAcquisitionData returns data array."""
         client.send_command("Connect")
-        client.send_command("DefineSpectrumFAT", {
-            "StartEnergy": 400.0,
-            "EndEnergy": 402.0,
-            "StepWidth": 0.5,
-            "DwellTime": 0.01,
-            "PassEnergy": 20.0,
-        })
+        client.send_template(DEFINE_FAT_5_SAMPLES)
         client.send_command("ValidateSpectrum")
         client.send_command("Start")
 
@@ -391,13 +349,7 @@ class TestAcquisitionCommands:
     def test_get_acquisition_data_invalid_range(self, client):
         """Test GetAcquisitionData with invalid range fails."""
         client.send_command("Connect")
-        client.send_command("DefineSpectrumFAT", {
-            "StartEnergy": 400.0,
-            "EndEnergy": 402.0,
-            "StepWidth": 0.5,
-            "DwellTime": 0.01,
-            "PassEnergy": 20.0,
-        })
+        client.send_template(DEFINE_FAT_5_SAMPLES)
         client.send_command("ValidateSpectrum")
         client.send_command("Start")
 
@@ -7,8 +7,14 @@ Remote In protocol (v1.22) are recognized and handled by the simulator/IOC.
 Reference: Documentation/SpecsLab_Prodigy_RemoteIn.md
 """
 
+import os
+import sys
 import pytest
 
+# Ensure conftest can be imported
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from conftest import DEFINE_FAT_5_SAMPLES, DEFINE_FAT_21_SAMPLES
+
 
 # Complete list of commands from SpecsLab Prodigy Remote In protocol v1.22
 # Section 2: List of Commands (Requests from Client to SpecsLab Prodigy)
@@ -377,13 +383,7 @@ class TestProtocolCommandRecognition:
     def test_define_spectrum_fat_recognized(self, client):
         """Test DefineSpectrumFAT command is recognized."""
         client.send_command("Connect")
-        response = client.send_command("DefineSpectrumFAT", {
-            "StartEnergy": 400.0,
-            "EndEnergy": 410.0,
-            "StepWidth": 0.5,
-            "DwellTime": 0.1,
-            "PassEnergy": 20.0,
-        })
+        response = client.send_template(DEFINE_FAT_21_SAMPLES)
         assert "Error:101" not in response, "DefineSpectrumFAT returned 'unknown command'"
         assert "OK" in response
 
@@ -425,13 +425,7 @@ class TestProtocolCommandRecognition:
     def test_validate_spectrum_recognized(self, client):
         """Test ValidateSpectrum command is recognized."""
         client.send_command("Connect")
-        client.send_command("DefineSpectrumFAT", {
-            "StartEnergy": 400.0,
-            "EndEnergy": 410.0,
-            "StepWidth": 0.5,
-            "DwellTime": 0.1,
-            "PassEnergy": 20.0,
-        })
+        client.send_template(DEFINE_FAT_21_SAMPLES)
         response = client.send_command("ValidateSpectrum")
         assert "Error:101" not in response, "ValidateSpectrum returned 'unknown command'"
         assert "OK" in response
@@ -479,13 +473,7 @@ class TestProtocolCommandRecognition:
     def test_clear_spectrum_recognized(self, client, wait_for_complete_func):
         """Test ClearSpectrum command is recognized."""
         client.send_command("Connect")
-        client.send_command("DefineSpectrumFAT", {
-            "StartEnergy": 400.0,
-            "EndEnergy": 402.0,
-            "StepWidth": 0.5,
-            "DwellTime": 0.01,
-            "PassEnergy": 20.0,
-        })
+        client.send_template(DEFINE_FAT_5_SAMPLES)
         client.send_command("ValidateSpectrum")
         client.send_command("Start")
         wait_for_complete_func(client, timeout=30.0)
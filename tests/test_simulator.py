@@ -10,11 +10,19 @@ Tests verify:
 """
 
 import os
+import sys
 import pytest
 import socket
 import time
 import threading
 
+# Ensure conftest can be imported
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from conftest import (
+    DEFINE_FAT_5_SAMPLES, DEFINE_FAT_21_SAMPLES, extract_data, extract_points,
+    wait_for_points,
+)
+
 # Check if using external simulator
 USE_EXTERNAL_SIMULATOR = os.environ.get("USE_EXTERNAL_SIMULATOR", "0") == "1"
 
@@ -120,13 +128,7 @@ class TestSimulatorStateMachine:
     def test_state_validated_after_validate(self, client):
         """Test state changes to validated after ValidateSpectrum."""
         client.send_command("Connect")
-        client.send_command("DefineSpectrumFAT", {
-            "StartEnergy": 400.0,
-            "EndEnergy": 410.0,
-            "StepWidth": 0.5,
-            "DwellTime": 0.1,
-            "PassEnergy": 20.0,
-        })
+        client.send_template(DEFINE_FAT_21_SAMPLES)
         client.send_command("ValidateSpectrum")
 
         response = client.send_command("GetAcquisitionStatus")
@@ -224,8 +226,7 @@ class TestSimulatorDataGeneration:
         })
 
         # Parse data
-        data_str = response.split("Data:[")[1].split("]")[0]
-        data = [float(x) for x in data_str.split(",")]
+        data = extract_data(response)
 
         assert len(data) == 21
 
@@ -258,8 +259,7 @@ class TestSimulatorDataGeneration:
             "ToIndex": 20,
         })
 
-        data_str = response.split("Data:[")[1].split("]")[0]
-        data = [float(x) for x in data_str.split(",")]
+        data = extract_data(response)
 
         for value in data:
             assert value >= 0, f"Negative value found: {value}"
@@ -285,8 +285,7 @@ class TestSimulatorDataGeneration:
             "ToIndex": 9,
         })
 
-        data_str = response.split("Data:[")[1].split("]")[0]
-        data = [float(x) for x in data_str.split(",")]
+        data = extract_data(response)
 
         assert len(data) == 10
 
@@ -301,13 +300,7 @@ class TestSimulatorSpectrumModes:
     def test_fat_mode(self, client, wait_for_complete_func):
         """Test Fixed Analyzer Transmission mode."""
         client.send_command("Connect")
-        response = client.send_command("DefineSpectrumFAT", {
-            "StartEnergy": 400.0,
-            "EndEnergy": 402.0,
-            "StepWidth": 0.5,
-            "DwellTime": 0.01,
-            "PassEnergy": 20.0,
-        })
+        response = client.send_template(DEFINE_FAT_5_SAMPLES)
         assert "OK" in response
 
         client.send_command("ValidateSpectrum")
@@ -389,31 +382,19 @@ class TestSimulatorProgress:
     def test_progress_increments(self, client):
         """Test that NumberOfAcquiredPoints increments during acquisition."""
         client.send_command("Connect")
-        client.send_command("DefineSpectrumFAT", {
-            "StartEnergy": 400.0,
-            "EndEnergy": 410.0,
-            "StepWidth": 0.5,
-            "DwellTime": 0.1,  # Slower to observe progress
-            "PassEnergy": 20.0,
-        })
+        client.send_template(DEFINE_FAT_21_SAMPLES)  # 0.1 s dwell: observable progress
         client.send_command("ValidateSpectrum")
         client.send_command("Start")
 
-        # Collect progress values
-        progress_values = []
+        # Collect progress values, each taken as soon as a new point lands
+        progress_values = [0]
         for _ in range(5):
-            response = client.send_command("GetAcquisitionStatus")
-            if "NumberOfAcquiredPoints:" in response:
-                parts = response.split("NumberOfAcquiredPoints:")
-                if len(parts) > 1:
-                    progress = int(parts[1].split()[0])
-                    progress_values.append(progress)
-            time.sleep(0.2)
-
-        # Progress should be increasing (or stable if finished)
-        assert len(progress_values) > 0
-        # Should see some variation (not all zeros)
-        assert max(progress_values) > 0
+            progress_values.append(
+                wait_for_points(client, after_points=progress_values[-1])
+            )
+
+        # Every wait saw at least one more point
+        assert all(b > a for a, b in zip(progress_values, progress_values[1:]))
 
         # Cleanup
         client.send_command("Abort")
@@ -435,6 +416,46 @@ class TestSimulatorProgress:
 
         response = client.send_command("GetAcquisitionStatus")
         if "NumberOfAcquiredPoints:" in response:
-            parts = response.split("NumberOfAcquiredPoints:")
-            final_progress = int(parts[1].split()[0])
+            final_progress = extract_points(response)
             assert final_progress == 5  # (402 - 400) / 0.5 + 1 = 5
+
+    def test_define_while_running_keeps_acquisition_geometry(
+            self, client, wait_for_complete_func):
+        """Test that a Define during an acquisition does not resize it."""
+        client.send_command("Connect")
+        client.send_command("DefineSpectrumFAT", {
+            "StartEnergy": 400.0,
+            "EndEnergy": 402.0,  # 5 samples
+            "StepWidth": 0.5,
+            "DwellTime": 0.01,
+            "PassEnergy": 20.0,
+            "ValuesPerSample": 4,
+        })
+        client.send_command("ValidateSpectrum")
+        client.send_command("Start")
+        client.send_command("DefineSpectrumFAT", {
+            "StartEnergy": 400.0,
+            "EndEnergy": 402.0,
+            "StepWidth": 0.5,
+            "DwellTime": 0.01,
+            "PassEnergy": 20.0,
+            "ValuesPerSample": 4,
+            "NumberOfSlices": 3,
+        })
+
+        wait_for_complete_func(client, timeout=10.0)
+
+        response = client.send_command("GetAcquisitionStatus")
+        assert extract_points(response) == 5
+
+        # Only the 5 x 4 values of the running spectrum are readable
+        response = client.send_command("GetAcquisitionData", {
+            "FromIndex": 0,
+            "ToIndex": 19,
+        })
+        assert len(extract_data(response)) == 20
+        response = client.send_command("GetAcquisitionData", {
+            "FromIndex": 20,
+            "ToIndex": 23,
+        })
+        assert "Error" in response